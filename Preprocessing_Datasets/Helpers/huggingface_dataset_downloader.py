@@ -1,12 +1,46 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Callable
+from string import Formatter as TemplateParser
+from typing import List, Dict, Any, Iterator, Optional, Callable
 import json
-from datasets import load_dataset, DatasetDict, Dataset
+import pyarrow as pa
+import pyarrow.compute as pc
+from datasets import load_dataset, load_dataset_builder, get_dataset_split_names, DatasetDict, Dataset
+
+
+def _is_string_type(arrow_type: pa.DataType) -> bool:
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
 
 
 class DatasetProcessor(ABC):
-    """Abstract base class for dataset processing operations."""
-    
+    """
+    Abstract base class for dataset processing operations.
+
+    Processors that go through `dataset.map` / `dataset.filter` take
+    `batched`, `batch_size` and `num_proc` and pass them on via `map_kwargs()`.
+    `input_columns` lists the columns a processor reads (None means unknown
+    or all), which lets the pipeline drop unused columns up front.
+    """
+
+    def __init__(self, batched: bool = False, batch_size: int = 1000, num_proc: Optional[int] = None):
+        self.batched = batched
+        self.batch_size = batch_size
+        self.num_proc = num_proc
+
+    @property
+    def input_columns(self) -> Optional[List[str]]:
+        return None
+
+    @property
+    def replaces_columns(self) -> bool:
+        """True if the output no longer has the input columns (later processors read new ones)."""
+        return False
+
+    def map_kwargs(self) -> Dict[str, Any]:
+        kwargs = {"batched": self.batched, "num_proc": self.num_proc}
+        if self.batched:
+            kwargs["batch_size"] = self.batch_size
+        return kwargs
+
     @abstractmethod
     def process(self, dataset: Dataset) -> Dataset:
         """Process a dataset according to specific logic."""
@@ -17,7 +51,16 @@ class ColumnSelector(DatasetProcessor):
     """Selects specified columns from the dataset."""
     
     def __init__(self, columns: List[str]):
+        super().__init__()
         self.columns = columns
+
+    @property
+    def input_columns(self) -> Optional[List[str]]:
+        return self.columns
+
+    @property
+    def replaces_columns(self) -> bool:
+        return True
     
     def process(self, dataset: Dataset) -> Dataset:
         available_columns = set(dataset.column_names)
@@ -28,39 +71,165 @@ class ColumnSelector(DatasetProcessor):
 
 
 class FilterProcessor(DatasetProcessor):
-    """Applies filtering logic to the dataset."""
+    """
+    Applies filtering logic to the dataset.
+
+    With batched=True `filter_fn` gets a dict of column lists and returns a
+    list of bools. Passing `columns` hands only those columns to `filter_fn`
+    (as positional arguments, see `datasets.Dataset.filter(input_columns=...)`).
+    """
     
-    def __init__(self, filter_fn: Callable[[Dict[str, Any]], bool]):
+    def __init__(
+        self,
+        filter_fn: Callable[..., Any],
+        columns: Optional[List[str]] = None,
+        batched: bool = False,
+        batch_size: int = 1000,
+        num_proc: Optional[int] = None
+    ):
+        super().__init__(batched, batch_size, num_proc)
         self.filter_fn = filter_fn
+        self.columns = columns
+
+    @property
+    def input_columns(self) -> Optional[List[str]]:
+        return self.columns
     
     def process(self, dataset: Dataset) -> Dataset:
-        return dataset.filter(self.filter_fn)
+        return dataset.filter(self.filter_fn, input_columns=self.columns, **self.map_kwargs())
+
+
+class TagFilter(DatasetProcessor):
+    """
+    Keeps rows whose `column` contains `keyword` (case-insensitive); nulls and
+    non-string values are dropped.
+
+    Evaluated as a columnar predicate on Arrow batches (pyarrow.compute), so
+    no row is converted to Python objects.
+    """
+
+    def __init__(self, column: str, keyword: str, batch_size: int = 10_000, num_proc: Optional[int] = None):
+        super().__init__(True, batch_size, num_proc)
+        self.column = column
+        self.keyword = keyword.lower()
+
+    @property
+    def input_columns(self) -> Optional[List[str]]:
+        return [self.column]
+
+    def process(self, dataset: Dataset) -> Dataset:
+        if self.column not in dataset.column_names:
+            raise ValueError(f"Columns not found in dataset: { {self.column} }")
+        if not _is_string_type(dataset.features.arrow_schema.field(self.column).type):
+            return dataset.select([])
+        column, keyword = self.column, self.keyword
+
+        def predicate(batch: pa.Table) -> pa.Array:
+            matches = pc.match_substring(pc.utf8_lower(batch[column]), keyword)
+            return pc.fill_null(matches, False)
+
+        return dataset.with_format("arrow").filter(predicate, **self.map_kwargs()).with_format(None)
 
 
 class Formatter(DatasetProcessor):
-    """Formats dataset into instruction-output pairs."""
+    """
+    Formats dataset into instruction-output pairs.
+
+    Batched by default. Templates made only of plain `{column}` fields over
+    string columns are built column-wise with pyarrow.compute; anything else
+    (format specs, attribute access, non-string columns) formats each row of
+    the batch with `str.format`, giving the same text.
+    """
     
-    def __init__(self, instruction_template: str, output_column: str):
+    def __init__(
+        self,
+        instruction_template: str,
+        output_column: str,
+        batched: bool = True,
+        batch_size: int = 1000,
+        num_proc: Optional[int] = None
+    ):
         """
         Args:
             instruction_template: Template string with column names in curly braces
             output_column: Name of the column to use as output
+            batched: Format a batch of rows per call instead of one row
+            batch_size: Rows per batch when batched
+            num_proc: Worker processes for `dataset.map` (None = in process)
         """
+        super().__init__(batched, batch_size, num_proc)
         self.instruction_template = instruction_template
         self.output_column = output_column
+        self._parts = list(TemplateParser().parse(instruction_template))
+        self.template_fields = [field for _, field, _, _ in self._parts if field is not None]
+
+    @property
+    def input_columns(self) -> Optional[List[str]]:
+        names = [field.split(".")[0].split("[")[0] for field in self.template_fields]
+        if any(not name or name.isdigit() for name in names):
+            return None  # positional fields; let process() report them
+        return list(dict.fromkeys(names + [self.output_column]))
+
+    @property
+    def replaces_columns(self) -> bool:
+        return True
     
     def process(self, dataset: Dataset) -> Dataset:
-        def format_example(example):
-            try:
-                instruction = self.instruction_template.format(**example)
-                return {
-                    "instruction": instruction,
-                    "output": example[self.output_column]
-                }
-            except KeyError as e:
-                raise ValueError(f"Missing key in template: {e}")
-        
-        return dataset.map(format_example, remove_columns=dataset.column_names)
+        missing = [name for name in (self.input_columns or []) if name not in dataset.column_names]
+        if missing:
+            raise ValueError(f"Missing key in template: {missing[0]!r}")
+
+        if not self.batched:
+            return dataset.map(self._format_example, remove_columns=dataset.column_names, **self.map_kwargs())
+        if self._is_columnar(dataset):
+            return dataset.with_format("arrow").map(
+                self._format_table, remove_columns=dataset.column_names, **self.map_kwargs()
+            ).with_format(None)
+        return dataset.map(self._format_batch, remove_columns=dataset.column_names, **self.map_kwargs())
+
+    def _format_example(self, example: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            instruction = self.instruction_template.format(**example)
+            return {
+                "instruction": instruction,
+                "output": example[self.output_column]
+            }
+        except KeyError as e:
+            raise ValueError(f"Missing key in template: {e}")
+
+    def _format_batch(self, batch: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        columns = list(batch)
+        rows = (dict(zip(columns, values)) for values in zip(*batch.values()))
+        return {
+            "instruction": [self.instruction_template.format(**row) for row in rows],
+            "output": batch[self.output_column]
+        }
+
+    def _format_table(self, batch: pa.Table) -> pa.Table:
+        pieces = []
+        for literal, field, _, _ in self._parts:
+            if literal:
+                pieces.append(pa.scalar(literal))
+            if field is not None:
+                pieces.append(pc.fill_null(batch[field], "None"))  # str.format renders None as "None"
+        if not pieces:
+            instruction = pa.array([""] * batch.num_rows)
+        elif len(pieces) == 1 and isinstance(pieces[0], pa.Scalar):
+            instruction = pa.array([pieces[0].as_py()] * batch.num_rows)
+        else:
+            instruction = pc.binary_join_element_wise(*pieces, "")
+        return pa.table({"instruction": instruction, "output": batch[self.output_column]})
+
+    def _is_columnar(self, dataset: Dataset) -> bool:
+        schema = dataset.features.arrow_schema
+        for _, field, spec, conversion in self._parts:
+            if field is None:
+                continue
+            if spec or conversion or field not in dataset.column_names:
+                return False
+            if not _is_string_type(schema.field(field).type):
+                return False
+        return True
 
 
 class HuggingFaceDatasetPipeline:
@@ -83,71 +252,147 @@ class HuggingFaceDatasetPipeline:
         self.dataset_name = dataset_name
         self.splits = splits
         self.processors = processors or []
+        self._available_splits: Optional[List[str]] = None
+        self._data_files = None
+        self._processed: Dict[str, Dataset] = {}
     
     def add_processor(self, processor: DatasetProcessor) -> None:
         """Add a processing step to the pipeline."""
         self.processors.append(processor)
+        self._processed.clear()
     
+    def required_columns(self) -> Optional[List[str]]:
+        """
+        Columns the processors read before the first one that replaces the
+        columns (ColumnSelector, Formatter), or None if some processor on
+        the way does not declare its inputs.
+        """
+        required = []
+        for processor in self.processors:
+            columns = processor.input_columns
+            if columns is None:
+                return None
+            required.extend(column for column in columns if column not in required)
+            if processor.replaces_columns:
+                return required
+        return None
+
     def _process_split(self, dataset_split: Dataset) -> Dataset:
         """Apply all processors to a single dataset split."""
         processed = dataset_split
+        # Projection pushdown: unused columns are dropped (an Arrow-level, zero-copy
+        # select) before any processor decodes rows
+        required = self.required_columns()
+        if required is not None and set(required) <= set(processed.column_names) \
+                and len(required) < len(processed.column_names):
+            processed = processed.select_columns(required)
         for processor in self.processors:
             processed = processor.process(processed)
         return processed
     
+    def available_splits(self) -> List[str]:
+        """Split names of the dataset, read from its metadata (no data is prepared)."""
+        if self._available_splits is None:
+            self._available_splits = get_dataset_split_names(self.dataset_name)
+        return self._available_splits
+
+    def process_split(self, split: str) -> Dataset:
+        """
+        Load and process one split, memoized so repeated saves don't re-run
+        the pipeline. See `_load_split` for what gets downloaded/prepared.
+        """
+        if split not in self._processed:
+            if split not in self.available_splits():
+                raise ValueError(f"Splits not found in dataset: { {split} }")
+            print(f"Processing split: {split}")
+            self._processed[split] = self._process_split(self._load_split(split))
+        return self._processed[split]
+
+    def _load_split(self, split: str) -> Dataset:
+        """
+        Datasets stored as data files (Parquet, JSON, CSV, ... - most of the
+        Hub) are loaded from the split's own files only, so the other splits
+        are neither downloaded nor converted to Arrow. Otherwise
+        `load_dataset(split=...)` is the fallback, which prepares every split
+        and returns a view of this one.
+        """
+        if self._data_files is None:
+            self._data_files = getattr(load_dataset_builder(self.dataset_name).config, "data_files", None) or {}
+        if split in self._data_files:
+            return load_dataset(self.dataset_name, data_files={split: list(self._data_files[split])}, split=split)
+        return load_dataset(self.dataset_name, split=split)
+    
     def run(self) -> DatasetDict:
         """Execute the full pipeline and return processed dataset."""
-        # Load dataset
-        raw_dataset = load_dataset(self.dataset_name)
-        
         # Determine splits to process
         if self.splits is None:
-            target_splits = list(raw_dataset.keys())
+            target_splits = self.available_splits()
         else:
-            missing_splits = set(self.splits) - set(raw_dataset.keys())
+            missing_splits = set(self.splits) - set(self.available_splits())
             if missing_splits:
                 raise ValueError(f"Splits not found in dataset: {missing_splits}")
             target_splits = self.splits
         
         # Process each split
-        processed_splits = {}
-        for split in target_splits:
-            print(f"Processing split: {split}")
-            processed_splits[split] = self._process_split(raw_dataset[split])
-        
-        return DatasetDict(processed_splits)
+        return DatasetDict({split: self.process_split(split) for split in target_splits})
+
+    def _output_split(self, split: Optional[str]) -> Dataset:
+        if split is None:
+            split = (self.splits or self.available_splits())[0]
+        elif self.splits is not None and split not in self.splits:
+            raise ValueError(f"Split '{split}' not found in processed data")
+        dataset = self.process_split(split)
+        return dataset.select_columns(["instruction", "output"]) if len(dataset) else dataset
+
+    def _iter_records(self, dataset: Dataset, batch_size: int) -> Iterator[Dict[str, Any]]:
+        for batch in dataset.iter(batch_size=batch_size):
+            for instruction, output in zip(batch["instruction"], batch["output"]):
+                yield {"instruction": instruction, "output": output}
     
-    def save_to_json(self, output_path: str, split: Optional[str] = None) -> None:
+    def save_to_json(self, output_path: str, split: Optional[str] = None, batch_size: int = 10_000) -> None:
         """
         Save processed dataset to JSON format.
+
+        Records are written as they are read, `batch_size` rows at a time; the
+        file is the same indented JSON array `json.dump(..., indent=2)` gives.
         
         Args:
             output_path: Path to save JSON file
             split: Specific split to save (if None, saves first available split)
+            batch_size: Rows read from the Arrow table per batch
         """
-        processed_data = self.run()
-        
-        if split is None:
-            split = next(iter(processed_data.keys()))
-        elif split not in processed_data:
-            raise ValueError(f"Split '{split}' not found in processed data")
-        
-        # Convert to list of dictionaries
-        data_list = [
-            {"instruction": ex["instruction"], "output": ex["output"]}
-            for ex in processed_data[split]
-        ]
-        
-        # Save as JSON
+        dataset = self._output_split(split)
+        count = 0
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data_list, f, indent=2, ensure_ascii=False)
-        print(f"Saved {len(data_list)} records to {output_path}")
+            for record in self._iter_records(dataset, batch_size):
+                item = json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write(("[\n  " if count == 0 else ",\n  ") + item)
+                count += 1
+            f.write("\n]" if count else "[]")
+        print(f"Saved {count} records to {output_path}")
+
+    def save_to_jsonl(self, output_path: str, split: Optional[str] = None, batch_size: int = 10_000) -> None:
+        """Save processed dataset as JSON Lines, streamed `batch_size` rows at a time."""
+        dataset = self._output_split(split)
+        count = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for record in self._iter_records(dataset, batch_size):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        print(f"Saved {count} records to {output_path}")
+
+    def save_to_parquet(self, output_path: str, split: Optional[str] = None, batch_size: int = 10_000) -> None:
+        """Save processed dataset as Parquet, written from Arrow batches (rows never become Python objects)."""
+        dataset = self._output_split(split)
+        dataset.to_parquet(output_path, batch_size=batch_size)
+        print(f"Saved {len(dataset)} records to {output_path}")
 
 
 # Convenience function for the specific Stack Overflow use case
 def create_stackoverflow_pipeline(
     dataset_name: str = "Azure99/stackoverflow-qa-top-300k",
-    splits: Optional[List[str]] = None
+    splits: Optional[List[str]] = None,
+    num_proc: Optional[int] = None
 ) -> HuggingFaceDatasetPipeline:
     """
     Create a pre-configured pipeline for Stack Overflow Python questions.
@@ -155,6 +400,7 @@ def create_stackoverflow_pipeline(
     Args:
         dataset_name: Hugging Face dataset identifier
         splits: Splits to process (e.g., ["train"])
+        num_proc: Worker processes for the filter/format steps (None = in process)
     
     Returns:
         Configured HuggingFaceDatasetPipeline
@@ -164,17 +410,14 @@ def create_stackoverflow_pipeline(
     # 1. Select required columns
     pipeline.add_processor(ColumnSelector(["title", "body", "answer_body", "tags"]))
     
-    # 2. Filter for Python-related tags
-    def python_filter(example):
-        tags = example["tags"]
-        return isinstance(tags, str) and "python" in tags.lower()
-    
-    pipeline.add_processor(FilterProcessor(python_filter))
+    # 2. Filter for Python-related tags (columnar, on Arrow batches)
+    pipeline.add_processor(TagFilter("tags", "python", num_proc=num_proc))
     
     # 3. Format as instruction-output pairs
     pipeline.add_processor(Formatter(
         instruction_template="{title}, {body}",
-        output_column="answer_body"
+        output_column="answer_body",
+        num_proc=num_proc
     ))
     
     return pipeline
@@ -185,10 +428,13 @@ if __name__ == "__main__":
     # Create and run the pipeline
     pipeline = create_stackoverflow_pipeline(splits=["train"])
     pipeline.save_to_json("stackoverflow_qa.json", split="train")
+    # Further saves reuse the processed split:
+    # pipeline.save_to_jsonl("stackoverflow_qa.jsonl", split="train")
+    # pipeline.save_to_parquet("stackoverflow_qa.parquet", split="train")
     
     # Alternative: Build custom pipeline
     # custom_pipeline = HuggingFaceDatasetPipeline("your/dataset", splits=["train"])
     # custom_pipeline.add_processor(ColumnSelector(["col1", "col2"]))
-    # custom_pipeline.add_processor(FilterProcessor(lambda x: x["col1"] > 5))
+    # custom_pipeline.add_processor(FilterProcessor(lambda col1: [v > 5 for v in col1], columns=["col1"], batched=True))
     # custom_pipeline.add_processor(Formatter("{col1} details: {col2}", "col2"))
     # custom_pipeline.save_to_json("custom_output.json")
\ No newline at end of file
@@ -0,0 +1,132 @@
+# benchmarks/bench_import_time.py
+"""
+Startup cost of the preprocessing CLI: `import main` and an instruction-only run.
+
+Each measurement runs in a fresh interpreter (best of --repeat). Also
+checks that neither loads the heavy dependencies (Hugging Face `datasets`,
+scikit-learn, pyarrow, ...), which only the dialogue stage should import.
+Exits non-zero on a regression, so it can run in CI.
+
+Run from Preprocessing_Datasets/:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --max-import-seconds 0.3 --output import_time.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+import yaml
+
+from .corpus import make_instructions
+
+CONFIG_PATH = "config/preprocessing_config.yaml"
+HEAVY_MODULES = ("datasets", "sklearn", "pyarrow", "pandas", "torch", "transformers")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter() - start
+{run}
+print(json.dumps({{
+    "import_seconds": imported,
+    "total_seconds": time.perf_counter() - start,
+    "heavy_modules": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def _probe(run: str, repeat: int) -> Dict:
+    """Best-of-`repeat` timings of importing main (and running `run`) in a fresh interpreter."""
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(run=run, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        if best is None or result["total_seconds"] < best["total_seconds"]:
+            best = result
+    return best
+
+
+def _slowest_imports(count: int) -> List[Dict]:
+    """Largest cumulative entries of `python -X importtime -c "import main"`."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "cumulative_ms": int(cumulative) / 1000})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:count]
+
+
+def _instruction_config(work_dir: str, size: int) -> str:
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    instruction_path = os.path.join(work_dir, "instructions.json")
+    with open(instruction_path, "w", encoding="utf-8") as f:
+        json.dump(make_instructions(size, seed=0), f, ensure_ascii=False)
+    output_dir = os.path.join(work_dir, "output")
+    config["datasets"]["instruction-sets"]["sources"] = [{"path": instruction_path, "type": "basic"}]
+    config["output"]["base_dir"] = output_dir
+    config["cache"]["enabled"] = False
+    config["profiling"] = {"enabled": False}
+    config_path = os.path.join(work_dir, "config.yaml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    return config_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--size", type=int, default=200, help="records in the instruction-only run")
+    parser.add_argument("--max-import-seconds", type=float, default=0.5, help="fail if `import main` is slower")
+    parser.add_argument("--output", default=None, help="optional JSON results file")
+    args = parser.parse_args()
+
+    results = {"import_main": _probe("", args.repeat)}
+    with tempfile.TemporaryDirectory(prefix="bench_import_") as work_dir:
+        config_path = _instruction_config(work_dir, args.size)
+        results["instruction_stage"] = _probe(f"main.main({config_path!r}, ('instruction',))", args.repeat)
+    results["slowest_imports"] = _slowest_imports(10)
+
+    for name in ("import_main", "instruction_stage"):
+        result = results[name]
+        print(
+            f"{name:<20} import {result['import_seconds']:.3f}s, total {result['total_seconds']:.3f}s, "
+            f"heavy modules: {', '.join(result['heavy_modules']) or 'none'}"
+        )
+    print("Slowest imports under `import main` (cumulative):")
+    for row in results["slowest_imports"]:
+        print(f"  {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+
+    failures = []
+    if results["import_main"]["import_seconds"] > args.max_import_seconds:
+        failures.append(
+            f"`import main` took {results['import_main']['import_seconds']:.3f}s "
+            f"(limit {args.max_import_seconds}s)"
+        )
+    for name in ("import_main", "instruction_stage"):
+        if results[name]["heavy_modules"]:
+            failures.append(f"{name} imported {', '.join(results[name]['heavy_modules'])}")
+    results["failures"] = failures
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results → {args.output}")
+    if failures:
+        raise SystemExit("Import-time regression: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
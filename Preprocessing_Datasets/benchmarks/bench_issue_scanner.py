@@ -0,0 +1,63 @@
+# benchmarks/bench_issue_scanner.py
+"""
+Texts/sec of IssueScanner._scan_text, before and after the early-exit backend.
+
+Run from Preprocessing_Datasets/:
+    python -m benchmarks.bench_issue_scanner --size 50000
+"""
+import argparse
+import time
+
+from preprocessing.constants import DIALOUGE_And_PERSONA_SCANNING_PATTERNS
+from preprocessing.issue_scanner import IssueScanner
+from preprocessing.text_cleaner import TextCleaner
+from .corpus import make_utterances
+
+
+def legacy_scan_text(text: str, counts: dict, patterns=DIALOUGE_And_PERSONA_SCANNING_PATTERNS):
+    """IssueScanner._scan_text (verbose off) as it was before the early-exit backend."""
+    for issue_name, pattern in patterns.items():
+        matches = pattern.findall(text)
+        if matches:
+            counts[issue_name] = counts.get(issue_name, 0) + 1
+
+
+def _run(fn, texts, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        counts = {}
+        start = time.perf_counter()
+        for t in texts:
+            fn(t, counts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raw = make_utterances(args.size, seed=args.seed)
+    cleaner = TextCleaner()
+    corpora = {"raw": raw, "cleaned": cleaner.clean_dialogue_text(raw)}
+    scanner = IssueScanner()
+
+    def scan(text, counts):
+        scanner._scan_text(text, counts, "bench", False)
+
+    for label, texts in corpora.items():
+        before, expected = _run(legacy_scan_text, texts, args.repeat)
+        after, counts = _run(scan, texts, args.repeat)
+        if counts != expected:
+            raise SystemExit(f"[{label}] issue counts differ: {counts} != {expected}")
+        print(f"[{label}] {len(texts)} texts (issue counts identical)")
+        print(f"  legacy findall: {before:,.0f} texts/sec")
+        print(f"  IssueScanner:   {after:,.0f} texts/sec")
+        print(f"  speedup:        {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# benchmarks/bench_suite.py
+"""
+Throughput of each preprocessing module on a synthetic corpus, plus an end-to-end run.
+
+Generates PersonaChat, DailyDialog and instruction corpora of --size records
+(noisy: HTML, URLs, emails, curly quotes, broken contractions, dashes, code),
+times every module in isolation (best of --repeat) and then runs main.main()
+end to end on the same corpora. Hugging Face loading is served from the
+in-memory corpora, so nothing is downloaded. Results are written as JSON for
+comparison across commits.
+
+Run from Preprocessing_Datasets/:
+    python -m benchmarks.bench_suite --size 10000 --output bench_results.json
+    python -m benchmarks.bench_suite --size 1000000 --only cleaner,scanner --no-end-to-end
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from unittest import mock
+
+os.environ.setdefault("HF_DATASETS_OFFLINE", "1")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import yaml
+from datasets import Dataset, DatasetDict
+
+from preprocessing.data_splitter import DataSplitter
+from preprocessing.dataset_merger import DatasetMerger
+from preprocessing.deduplicator import Deduplicator
+from preprocessing.formatters.dialogue_formatter import DialogueFormatter
+from preprocessing.issue_scanner import IssueScanner
+from preprocessing.model_formatters.dialogue_model_formatter import DialogueModelFormatter
+from preprocessing.model_formatters.instruction_model_formatter import InstructionModelFormatter
+from preprocessing.text_cleaner import TextCleaner
+from .corpus import make_daily_dialog, make_formatted_dialogues, make_instructions, make_persona_chat
+
+CONFIG_PATH = "config/preprocessing_config.yaml"
+GROUPS = ("cleaner", "scanner", "formatter", "dedup", "splitter", "merger", "model_formatter")
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _result(name: str, records: int, seconds: float) -> Dict:
+    rate = records / seconds if seconds > 0 else None
+    print(f"{name:<46} {records:>10,} records {seconds:>9.3f}s {rate or 0:>14,.0f} rec/s")
+    return {"name": name, "records": records, "seconds": round(seconds, 4), "records_per_second": round(rate or 0, 1)}
+
+
+def _corpora(size: int, seed: int) -> Dict[str, List[Dict]]:
+    return {
+        "persona": make_persona_chat(size, seed=seed),
+        "daily": {
+            subset: make_daily_dialog(size, seed=seed + offset)
+            for offset, subset in enumerate(("train", "validation", "test"), start=1)
+        },
+        "instructions": make_instructions(size, seed=seed + 10),
+    }
+
+
+def _dataset_dicts(corpora: Dict) -> Dict[str, DatasetDict]:
+    return {
+        "persona": DatasetDict({"train": Dataset.from_list(corpora["persona"])}),
+        "daily": DatasetDict({subset: Dataset.from_list(rows) for subset, rows in corpora["daily"].items()}),
+    }
+
+
+def bench_modules(corpora: Dict, datasets: Dict[str, DatasetDict], groups: List[str], repeat: int) -> List[Dict]:
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    persona_cfg = config["datasets"]["persona-chat"]
+    daily_cfg = config["datasets"]["daily-dialog"]
+    utterances = [row["utterance"] for row in corpora["daily"]["train"]]
+    instructions = corpora["instructions"]
+    dialogues = make_formatted_dialogues(corpora["persona"])
+    results = []
+
+    if "cleaner" in groups:
+        cleaner = TextCleaner()
+        results.append(_result(
+            "TextCleaner.clean_dialogue_text", len(utterances),
+            _best_of(lambda: cleaner.clean_dialogue_text(utterances), repeat)
+        ))
+        texts = [record["output"] for record in instructions]
+        results.append(_result(
+            "TextCleaner.clean_instruction_text", len(texts),
+            _best_of(lambda: [cleaner.clean_instruction_text(t) for t in texts], repeat)
+        ))
+
+    if "scanner" in groups:
+        scanner = IssueScanner()
+        results.append(_result(
+            "IssueScanner.scan_texts", len(utterances),
+            _best_of(lambda: [scanner.scan_texts([t]) for t in utterances], repeat)
+        ))
+
+    if "formatter" in groups:
+        formatter = DialogueFormatter()
+        results.append(_result(
+            "DialogueFormatter (PersonaChat)", len(corpora["persona"]),
+            _best_of(lambda: formatter.format_records(persona_cfg, datasets["persona"], "train"), repeat)
+        ))
+        results.append(_result(
+            "DialogueFormatter (DailyDialog, Arrow)", len(utterances),
+            _best_of(lambda: formatter.format_records(daily_cfg, datasets["daily"], "train"), repeat)
+        ))
+
+    if "dedup" in groups:
+        deduplicator = Deduplicator()
+        fields = ["instruction", "output"]
+        results.append(_result(
+            "Deduplicator.remove_duplicates", len(instructions),
+            _best_of(lambda: deduplicator.remove_duplicates(instructions, fields), repeat)
+        ))
+        results.append(_result(
+            "Deduplicator.remove_near_duplicates", len(instructions),
+            _best_of(lambda: deduplicator.remove_near_duplicates(instructions, fields), repeat)
+        ))
+
+    if "splitter" in groups:
+        for mode in DataSplitter.MODES:
+            splitter = DataSplitter(mode=mode)
+            results.append(_result(
+                f"DataSplitter.split ({mode})", len(dialogues),
+                _best_of(lambda: splitter.split(dialogues), repeat)
+            ))
+
+    if "merger" in groups:
+        thirds = [dialogues[i::3] for i in range(3)]
+        for window in (None, max(1, len(dialogues) // 10)):
+            merger = DatasetMerger(random_state=42, window_size=window or len(dialogues) + 1)
+            label = "in memory" if window is None else f"window {window}"
+            results.append(_result(
+                f"DatasetMerger.merge_and_shuffle ({label})", 3 * len(dialogues),
+                _best_of(lambda: merger.merge_and_shuffle(thirds, thirds, thirds), repeat)
+            ))
+
+    if "model_formatter" in groups:
+        dialogue_model = DialogueModelFormatter()
+        instruction_model = InstructionModelFormatter()
+        results.append(_result(
+            "DialogueModelFormatter.format_for_model", len(dialogues),
+            _best_of(lambda: dialogue_model.format_for_model(dialogues), repeat)
+        ))
+        results.append(_result(
+            "InstructionModelFormatter.format_for_model", len(instructions),
+            _best_of(lambda: instruction_model.format_for_model(instructions), repeat)
+        ))
+    return results
+
+
+def bench_end_to_end(corpora: Dict, datasets: Dict[str, DatasetDict], streaming: bool) -> Dict:
+    """Run main.main() on the synthetic corpora in a scratch directory; returns timing + stage profile."""
+    import main as pipeline
+
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as work_dir:
+        output_dir = os.path.join(work_dir, "output")
+        instruction_path = os.path.join(work_dir, "instructions.json")
+        with open(instruction_path, "w", encoding="utf-8") as f:
+            json.dump(corpora["instructions"], f, ensure_ascii=False)
+
+        config["datasets"]["instruction-sets"]["sources"] = [{"path": instruction_path, "type": "basic"}]
+        config["output"]["base_dir"] = output_dir
+        config["cache"]["enabled"] = False
+        config["pipeline"]["streaming"] = streaming
+        config["profiling"] = {"enabled": True, "report_file": "profile.json", "profiler": None}
+        config_path = os.path.join(work_dir, "config.yaml")
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f)
+
+        by_name = {
+            config["datasets"]["persona-chat"]["name"]: datasets["persona"],
+            config["datasets"]["daily-dialog"]["name"]: datasets["daily"],
+        }
+
+        def load_dataset(name, split=None, streaming=False, **kwargs):
+            dataset = by_name[name]
+            if streaming:
+                dataset = {key: value.to_iterable_dataset() for key, value in dataset.items()}
+            return dataset[split] if split else dataset
+
+        with mock.patch("preprocessing.data_loader.load_dataset", load_dataset):
+            start = time.perf_counter()
+            pipeline.main(config_path)
+            seconds = time.perf_counter() - start
+
+        with open(os.path.join(output_dir, "profile.json"), encoding="utf-8") as f:
+            profile = json.load(f)
+
+    records = len(corpora["persona"]) + sum(len(rows) for rows in corpora["daily"].values()) + len(corpora["instructions"])
+    result = _result(f"end-to-end ({'streaming' if streaming else 'in-memory'})", records, seconds)
+    result["peak_rss_mb"] = profile["peak_rss_mb"]
+    result["stages"] = profile["stages"]
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000, help="records per corpus (10k-10M)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated subset of {','.join(GROUPS)}")
+    parser.add_argument("--no-end-to-end", action="store_true")
+    parser.add_argument("--streaming", action="store_true", help="also run the streaming end-to-end pipeline")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.only.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmark group(s): {sorted(unknown)}")
+
+    print(f"Generating synthetic corpora ({args.size:,} records each)...")
+    corpora = _corpora(args.size, args.seed)
+    datasets = _dataset_dicts(corpora)
+
+    results = bench_modules(corpora, datasets, groups, args.repeat)
+    end_to_end = []
+    if not args.no_end_to_end:
+        end_to_end.append(bench_end_to_end(corpora, datasets, streaming=False))
+        if args.streaming:
+            end_to_end.append(bench_end_to_end(corpora, datasets, streaming=True))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "size": args.size,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "modules": results,
+        "end_to_end": end_to_end,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
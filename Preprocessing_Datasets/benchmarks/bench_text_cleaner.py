@@ -0,0 +1,71 @@
+# benchmarks/bench_text_cleaner.py
+"""
+Utterances/sec of the common cleaning chain, before and after CleaningEngine.
+
+Run from Preprocessing_Datasets/:
+    python -m benchmarks.bench_text_cleaner --size 50000
+"""
+import argparse
+import re
+import time
+
+from preprocessing.constants import CLEANING_PATTERNS
+from preprocessing.text_cleaner import TextCleaner
+from .corpus import make_utterances
+
+
+def legacy_common_cleaning(text: str, patterns=CLEANING_PATTERNS) -> str:
+    """TextCleaner._apply_common_cleaning as it was before CleaningEngine."""
+    text = patterns["html_tags"].sub("", text)
+    text = patterns["urls"].sub("<URL>", text)
+    text = patterns["emails"].sub("<EMAIL>", text)
+    text = text.translate(str.maketrans("‘’“”", "''\"\""))
+    text = re.sub(r"'\s+", "'", text)
+    text = re.sub(r"\s+'", "'", text)
+    text = re.sub(r"\\+'", "'", text)
+    text = text.replace('\\"', '"')
+    text = patterns["broken_contractions"].sub(r"\1'\2", text)
+    text = re.sub(r"\s*[–—]+\s*", " - ", text)
+    text = patterns["unicode_dashes"].sub("-", text)
+    text = re.sub(r"\s*-\s*", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r" - - ", "", text)
+    text = patterns["spaced_punctuation"].sub(r"\1", text)
+    text = text.replace(" ,", ",")
+    return text.strip()
+
+
+def _rate(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = make_utterances(args.size, seed=args.seed)
+    cleaner = TextCleaner()
+
+    mismatches = [t for t in texts if cleaner._apply_common_cleaning(t) != legacy_common_cleaning(t)]
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} outputs differ from the legacy cleaner, e.g. {mismatches[0]!r}")
+
+    before = _rate(legacy_common_cleaning, texts, args.repeat)
+    after = _rate(cleaner._apply_common_cleaning, texts, args.repeat)
+    print(f"utterances:      {len(texts)} (outputs byte-identical)")
+    print(f"legacy chain:    {before:,.0f} utterances/sec")
+    print(f"CleaningEngine:  {after:,.0f} utterances/sec")
+    print(f"speedup:         {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
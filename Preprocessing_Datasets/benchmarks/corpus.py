@@ -0,0 +1,127 @@
+# benchmarks/corpus.py
+import random
+from typing import Dict, List, Tuple
+
+WORDS = (
+    "i you we they like love hate think know really very good bad movie music "
+    "dog cat work school weekend coffee travel book read play game friend family "
+    "city house car food pizza summer winter guitar python code bug test data"
+).split()
+
+# Noise fragments modelled on what IssueScanner reports for PersonaChat/DailyDialog
+NOISE = [
+    "<b>{w}</b>",
+    "<br/>",
+    "http://example.com/{w}",
+    "www.{w}.org",
+    "{w}@mail.com",
+    "“{w}”",
+    "‘{w}’",
+    "don ' t",
+    "can 't",
+    "it\\'s",
+    'say \\"{w}\\"',
+    "{w} — {w}",
+    "{w}–{w}",
+    "well-made",
+    "{w} - {w}",
+    "{w} .",
+    "{w} ,",
+    "{w}  ?",
+    "```{w}()```",
+    "`{w}`",
+    "{w} #{w} *",
+]
+
+
+def make_utterance(rng: random.Random, noise_rate: float = 0.3) -> str:
+    parts = []
+    for _ in range(rng.randint(4, 20)):
+        if rng.random() < noise_rate:
+            parts.append(rng.choice(NOISE).format(w=rng.choice(WORDS)))
+        else:
+            parts.append(rng.choice(WORDS))
+    return " ".join(parts) + rng.choice([".", "?", "!", " .", ""])
+
+
+def make_utterances(n: int, seed: int = 0, noise_rate: float = 0.3) -> List[str]:
+    rng = random.Random(seed)
+    return [make_utterance(rng, noise_rate) for _ in range(n)]
+
+
+# --- Whole-dataset generators (same record shapes as the Hub datasets / local JSON files) ---
+
+CODE_NOISE = [
+    "def {w}():\n    return {w}",
+    "```python\nprint('{w}')\n```",
+    "<code>{w}()</code>",
+    "see https://docs.python.org/3/library/{w}.html",
+    "it doesn't work — {w} fails",
+]
+
+
+def make_persona_chat(n: int, seed: int = 0, noise_rate: float = 0.3, turns: Tuple[int, int] = (6, 14)) -> List[Dict]:
+    """PersonaChat rows: {"conv_id", "dialogue": ["Persona A: ...", "Persona B: ...", ...]}."""
+    rng = random.Random(seed)
+    rows = []
+    for conv_id in range(n):
+        lines = [
+            ("Persona A: " if turn % 2 == 0 else "Persona B: ") + make_utterance(rng, noise_rate)
+            for turn in range(rng.randint(*turns))
+        ]
+        rows.append({"conv_id": conv_id, "dialogue": lines})
+    return rows
+
+
+def make_daily_dialog(n: int, seed: int = 0, noise_rate: float = 0.3, turns: Tuple[int, int] = (4, 10)) -> List[Dict]:
+    """`n` DailyDialog utterance rows {"dialog_id", "utterance"}, each dialogue's rows kept together."""
+    rng = random.Random(seed)
+    rows = []
+    dialog_id = 0
+    while len(rows) < n:
+        for _ in range(min(rng.randint(*turns), n - len(rows))):
+            rows.append({"dialog_id": dialog_id, "utterance": make_utterance(rng, noise_rate)})
+        dialog_id += 1
+    return rows
+
+
+def make_instructions(
+    n: int, seed: int = 0, noise_rate: float = 0.3, duplicate_rate: float = 0.05, near_duplicate_rate: float = 0.05
+) -> List[Dict]:
+    """
+    Instruction records {"instruction", "output"}; about `duplicate_rate` of
+    them repeat an earlier record exactly and `near_duplicate_rate` repeat
+    one with a single word changed.
+    """
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        roll = rng.random()
+        if records and roll < duplicate_rate:
+            records.append(dict(rng.choice(records)))
+        elif records and roll < duplicate_rate + near_duplicate_rate:
+            base = rng.choice(records)
+            words = base["output"].split(" ")
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            records.append({"instruction": base["instruction"], "output": " ".join(words)})
+        else:
+            output = " ".join(
+                rng.choice(CODE_NOISE).format(w=rng.choice(WORDS)) if rng.random() < noise_rate else make_utterance(rng, 0.1)
+                for _ in range(rng.randint(2, 6))
+            )
+            records.append({"instruction": make_utterance(rng, noise_rate / 2), "output": output})
+    return records
+
+
+def make_formatted_dialogues(rows: List[Dict]) -> List[Dict]:
+    """PersonaChat rows in the DialogueFormatter output shape, without running it."""
+    return [
+        {
+            "source": "synthetic",
+            "dialogue": [
+                {"role": "user" if line.startswith("Persona A: ") else "bot", "text": line[11:]}
+                for line in row["dialogue"]
+            ],
+        }
+        for row in rows
+    ]
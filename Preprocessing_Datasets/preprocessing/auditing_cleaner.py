@@ -0,0 +1,112 @@
+# preprocessing/auditing_cleaner.py
+import re
+from typing import Any, Dict, Iterable, Iterator, List
+from .batch_cleaner import BatchCleaner
+from .issue_scanner import IssueScanner
+
+class AuditingCleaner(BatchCleaner):
+    """
+    Scan-before, clean and scan-after in a single batched traversal.
+
+    Each record's texts are scanned, cleaned and scanned again while they are
+    already decoded, instead of iterating the dataset three times. Per-record
+    issue counts are returned as two extra columns so the totals survive
+    `num_proc` workers and the datasets cache; add them up with
+    `total_issues` and drop the columns afterwards.
+
+    Example:
+        audit = AuditingCleaner(text_key="utterance", is_list=False)
+        ds, issues_before, issues_after = audit.apply(ds, batched=True, num_proc=8)
+    """
+
+    BEFORE_COLUMN = "issues_before"
+    AFTER_COLUMN = "issues_after"
+
+    def __init__(
+        self,
+        text_key: str,
+        is_list: bool,
+        id_key: str = None,
+        verbose: bool = False,
+        patterns: Dict[str, re.Pattern] = None,
+        scan_patterns: Dict[str, re.Pattern] = None,
+        logger=None
+    ):
+        super().__init__(text_key, is_list, patterns=patterns, logger=logger)
+        self.id_key = id_key
+        self.verbose = verbose
+        self.scanner = IssueScanner(patterns=scan_patterns, logger=logger)
+
+    def __call__(self, batch: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        column = batch[self.text_key]
+        record_ids = batch.get(self.id_key) if self.id_key else None
+        cleaned, before, after = [], [], []
+
+        for idx, value in enumerate(column):
+            record_id = record_ids[idx] if record_ids is not None else "unknown"
+            texts = value if self.is_list else [value]
+            cleaned_texts = self.cleaner.clean_dialogue_text(texts)
+
+            before.append(self._row_counts(texts, record_id))
+            after.append(self._row_counts(cleaned_texts, record_id))
+            cleaned.append(cleaned_texts if self.is_list else cleaned_texts[0])
+        self.cleaner.log_summary()
+
+        return {
+            self.text_key: cleaned,
+            self.BEFORE_COLUMN: before,
+            self.AFTER_COLUMN: after,
+        }
+
+    def apply(self, dataset, **map_kwargs):
+        """
+        Map this cleaner over a `datasets.Dataset`.
+
+        Returns:
+            Tuple of (cleaned dataset, issues before, issues after).
+        """
+        mapped = dataset.map(self, **map_kwargs)
+        issues_before = self.total_issues(mapped[self.BEFORE_COLUMN])
+        issues_after = self.total_issues(mapped[self.AFTER_COLUMN])
+        cleaned = mapped.remove_columns([self.BEFORE_COLUMN, self.AFTER_COLUMN])
+        return cleaned, issues_before, issues_after
+
+    def iter_apply(
+        self,
+        dataset,
+        issues_before: Dict[str, int],
+        issues_after: Dict[str, int],
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily clean an IterableDataset (or any `map`-able dataset), yielding
+        cleaned records without the count columns.
+
+        Totals are added to `issues_before` / `issues_after` as records are
+        consumed, so they are complete once the iterator is exhausted.
+        """
+        mapped = dataset.map(self, batched=True, batch_size=batch_size)
+        for record in mapped:
+            self._add_counts(issues_before, record.pop(self.BEFORE_COLUMN))
+            self._add_counts(issues_after, record.pop(self.AFTER_COLUMN))
+            yield record
+
+    @staticmethod
+    def total_issues(rows: Iterable[Dict[str, int]]) -> Dict[str, int]:
+        """Sum per-record counts into the `issue_counts` dict IssueScanner returns."""
+        totals = {}
+        for row in rows:
+            AuditingCleaner._add_counts(totals, row)
+        return totals
+
+    @staticmethod
+    def _add_counts(totals: Dict[str, int], row: Dict[str, int]) -> None:
+        for issue_name, count in row.items():
+            if count:
+                totals[issue_name] = totals.get(issue_name, 0) + count
+
+    def _row_counts(self, texts: List[str], record_id) -> Dict[str, int]:
+        # Fixed keys keep the Arrow struct schema identical across batches
+        counts = dict.fromkeys(self.scanner.patterns, 0)
+        counts.update(self.scanner.scan_texts(texts, record_id, self.verbose))
+        return counts
@@ -0,0 +1,36 @@
+# preprocessing/batch_cleaner.py
+import re
+from typing import Any, Dict, List
+from .text_cleaner import TextCleaner
+
+class BatchCleaner:
+    """
+    Column-at-a-time cleaning function for `datasets.map(batched=True)`.
+
+    Holds no global state and pickles cleanly, so the same instance can be
+    fanned out across `num_proc` worker processes.
+
+    Example:
+        cleaner = BatchCleaner(text_key="dialogue", is_list=True)
+        ds = ds.map(cleaner, batched=True, batch_size=1000, num_proc=8)
+    """
+
+    def __init__(
+        self,
+        text_key: str,
+        is_list: bool,
+        patterns: Dict[str, re.Pattern] = None,
+        logger=None
+    ):
+        self.text_key = text_key
+        self.is_list = is_list
+        self.cleaner = TextCleaner(patterns=patterns, logger=logger)
+
+    def __call__(self, batch: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        column = batch[self.text_key]
+        if self.is_list:
+            cleaned = [self.cleaner.clean_dialogue_text(texts) for texts in column]
+        else:
+            cleaned = self.cleaner.clean_dialogue_text(column)
+        self.cleaner.log_summary()
+        return {self.text_key: cleaned}
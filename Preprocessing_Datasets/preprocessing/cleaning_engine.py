@@ -0,0 +1,105 @@
+# preprocessing/cleaning_engine.py
+import re
+from typing import Dict
+from .constants import CLEANING_PATTERNS
+
+# Literal rules of the common cleaning chain, compiled once at import time
+_QUOTE_TRANSLATION = str.maketrans("‘’“”", "''\"\"")
+_QUOTE_SPACING = re.compile(r"\s+'\s*|'\s+")        # "don ' t" → "don't"
+_ESCAPED_QUOTES = re.compile(r"\\+'")                # "don\\'t" → "don't"
+_EM_EN_DASH_RUNS = re.compile(r"\s*[–—]+\s*")         # "a — b" → "a - b"
+_DASH_OR_SPACE_RUNS = re.compile(r"[\s\-]{2,}|(?! )[\s\-]")
+_ANY_DASH_OR_SPACE_RUNS = re.compile(r"[\s\-–—]{2,}|(?! )[\s\-–—]")
+
+# Substrings a default pattern cannot match without; lets the engine skip
+# a regex pass over texts that are already clean for that rule.
+_REQUIRED_SUBSTRINGS = {
+    "html_tags": ("<",),
+    "urls": ("http", "www."),
+    "emails": ("@",),
+    "broken_contractions": ("'",),
+}
+
+
+class CleaningEngine:
+    """
+    Precompiled, reduced-pass form of the common cleaning chain.
+
+    The rule chain is built once from the cleaning patterns. Passes that the
+    original chain ran back to back are fused where the result is provably
+    identical:
+      - whitespace before and after quotes is removed in one pass
+      - em/en dash normalisation, hyphen removal and whitespace collapsing
+        become a single "dash or whitespace run → one space" pass
+    Rules whose default pattern needs a literal substring (e.g. "@" for
+    emails) are skipped for texts that do not contain it.
+
+    Custom patterns are honoured; fusions and skips that depend on the shape
+    of a default pattern are only applied when that default is in use.
+    """
+
+    def __init__(self, patterns: Dict[str, re.Pattern] = None):
+        self.patterns = patterns or CLEANING_PATTERNS
+
+        self._html_tags = self._rule("html_tags", "")
+        self._urls = self._rule("urls", "<URL>")
+        self._emails = self._rule("emails", "<EMAIL>")
+        self._broken_contractions = self._rule("broken_contractions", r"\1'\2")
+        self._spaced_punctuation = self.patterns["spaced_punctuation"].sub
+
+        # Default unicode_dashes maps every dash to "-", which the hyphen and
+        # whitespace rules then turn into a single space.
+        self._fused_dashes = self._is_default("unicode_dashes")
+        self._unicode_dashes = self.patterns["unicode_dashes"].sub
+        # Default spaced_punctuation already removes every " ,".
+        self._fix_comma_spacing = not self._is_default("spaced_punctuation")
+
+    def clean(self, text: str) -> str:
+        # Remove structural noise
+        text = self._html_tags(text)
+        text = self._urls(text)
+        text = self._emails(text)
+
+        # Normalize quotes and contractions
+        text = text.translate(_QUOTE_TRANSLATION)
+        if "'" in text:
+            text = _QUOTE_SPACING.sub("'", text)
+        if "\\" in text:
+            text = _ESCAPED_QUOTES.sub("'", text)
+            text = text.replace('\\"', '"')
+        text = self._broken_contractions(text)
+
+        # Normalize dashes and collapse whitespace
+        if self._fused_dashes:
+            text = _ANY_DASH_OR_SPACE_RUNS.sub(" ", text)
+        else:
+            text = _EM_EN_DASH_RUNS.sub(" - ", text)
+            text = self._unicode_dashes("-", text)
+            text = _DASH_OR_SPACE_RUNS.sub(" ", text)
+
+        # Fix punctuation spacing
+        text = self._spaced_punctuation(r"\1", text)
+        if self._fix_comma_spacing:
+            text = text.replace(" ,", ",")
+        return text.strip()
+
+    def __reduce__(self):
+        # The compiled rules are closures; rebuild them from the patterns so
+        # the engine can be shipped to datasets.map worker processes.
+        return (CleaningEngine, (self.patterns,))
+
+    def _is_default(self, name: str) -> bool:
+        # Patterns compare equal by source and flags, which survives pickling
+        return self.patterns[name] == CLEANING_PATTERNS.get(name)
+
+    def _rule(self, name: str, replacement: str):
+        sub = self.patterns[name].sub
+        needles = _REQUIRED_SUBSTRINGS.get(name) if self._is_default(name) else None
+        if not needles:
+            return lambda text: sub(replacement, text)
+        if len(needles) == 1:
+            needle = needles[0]
+            return lambda text: sub(replacement, text) if needle in text else text
+        return lambda text: (
+            sub(replacement, text) if any(n in text for n in needles) else text
+        )
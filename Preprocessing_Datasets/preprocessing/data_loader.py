@@ -1,36 +1,212 @@
 # preprocessing/data_loader.py
+import gzip
+import io
+import itertools
 import json
 from pathlib import Path
-from typing import Any, List, Dict
-from datasets import load_dataset, DatasetDict
+from typing import Any, List, Dict, Iterable, Iterator
+
+# Output formats selectable per output in the `output.formats` config section
+OUTPUT_FORMATS = ("json", "jsonl", "jsonl.gz", "jsonl.zst")
+
+
+def iter_json_records(filepath: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Lazily yield the elements of a top-level JSON array, or the lines of a
+    JSONL file (detected from the first character), optionally .gz/.zst
+    compressed.
+
+    The array is read `chunk_size` characters at a time and decoded one
+    element at a time, so memory follows the largest record, not the file.
+    """
+    decoder = json.JSONDecoder()
+    with DatasetLoader._open_text(filepath, "r") as f:
+        buffer, pos, eof = "", 0, False
+
+        def fill(pos):
+            # Drop consumed text, then read at least as much as is buffered
+            # so retries on a large record stay linear overall
+            nonlocal buffer, eof
+            buffer = buffer[pos:]
+            chunk = f.read(max(chunk_size, len(buffer)))
+            eof = not chunk
+            buffer += chunk
+            return 0
+
+        def skip_whitespace(pos):
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return pos
+                pos = fill(pos)
+
+        pos = skip_whitespace(pos)
+        if pos == len(buffer):
+            return
+        if buffer[pos] != "[":
+            # JSONL: one record per non-blank line
+            # readline() completes the buffer's last, possibly partial, line
+            for line in itertools.chain(io.StringIO(buffer[pos:] + f.readline()), f):
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        pos = skip_whitespace(pos + 1)
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # A number cut by the buffer end decodes as a shorter one ("1.5e" → 1.5),
+                # so only accept a value followed by a delimiter (or at EOF)
+                if not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                    raise ValueError("value may be truncated")
+            except ValueError:
+                if eof:
+                    raise
+                pos = fill(pos)
+                continue
+            yield record
+            pos = skip_whitespace(end)
+            if pos == len(buffer):
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] != ",":
+                raise json.JSONDecodeError("Expected ',' or ']' between array elements", buffer, pos)
+            pos = skip_whitespace(pos + 1)
+
+def load_dataset(*args, **kwargs):
+    """`datasets.load_dataset`, imported on first use: importing `datasets` takes seconds."""
+    from datasets import load_dataset as hf_load_dataset
+    return hf_load_dataset(*args, **kwargs)
+
 
 class DatasetLoader:
     def load_huggingface_dataset(self, dataset_name: str, split=None, streaming=False, columns=None):
-        """Load Hugging Face dataset with optional column selection."""
-        if streaming:
-            dataset = load_dataset(dataset_name, split=split, streaming=streaming)
-            if columns:
-                # For streaming, we'll filter columns during iteration
-                return dataset  # columns handled in main loop
-            return dataset
-        else:
-            dataset = load_dataset(dataset_name)
-            if columns and split:
-                # Non-streaming: select columns
-                return dataset.map(lambda x: {k: x[k] for k in columns if k in x}, 
-                                remove_columns=[k for k in dataset[split].column_names if k not in columns])
-            return dataset
+        """
+        Load Hugging Face dataset with optional column selection.
+
+        With `streaming=True` an IterableDataset(Dict) is returned and nothing
+        is downloaded up front. `columns` is projected with `select_columns`
+        in both modes, so unused columns are never decoded.
+        """
+        dataset = load_dataset(dataset_name, split=split, streaming=streaming)
+        if columns:
+            dataset = dataset.select_columns(list(columns))
+        return dataset
 
     def load_json_file(self, filepath: str) -> List[Dict]:
         with open(filepath, encoding="utf-8") as f:
             return json.load(f)
 
+    def iter_json_records(self, filepath: str) -> Iterator[Dict]:
+        """Record-at-a-time `load_json_file` that also accepts JSONL (see `iter_json_records`)."""
+        return iter_json_records(filepath)
+
     def save_json(self, data: List[Dict], filepath: str) -> None:
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
+    def save_jsonl(self, records: Iterable[Dict], filepath: str) -> int:
+        """
+        Write records one JSON object per line, consuming `records` lazily.
+
+        Compression follows the extension: `.gz` (gzip) or `.zst` (zstandard).
+        Returns the number of records written.
+        """
+        with self.jsonl_writer(filepath) as writer:
+            for record in records:
+                writer.write(record)
+        return writer.count
+
+    def jsonl_writer(self, filepath: str) -> "JsonlWriter":
+        """Incremental writer for when records go to several files as they arrive."""
+        return JsonlWriter(filepath)
+
+    def iter_jsonl(self, filepath: str) -> Iterator[Dict]:
+        """Lazily read a (optionally .gz/.zst compressed) JSONL file."""
+        with self._open_text(filepath, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def save_records(self, records: Iterable[Dict], filepath_stem: str, fmt: str = "json") -> str:
+        """
+        Save records as `<filepath_stem>.<fmt>` and return the path written.
+
+        `fmt` is one of OUTPUT_FORMATS; "json" keeps the indented JSON array.
+        """
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {fmt}. Expected one of {OUTPUT_FORMATS}")
+        filepath = f"{filepath_stem}.{fmt}"
+        if fmt == "json":
+            self.save_json(records if isinstance(records, list) else list(records), filepath)
+        else:
+            self.save_jsonl(records, filepath)
+        return filepath
+
     def save_text(self, text: str, filepath: str) -> None:
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         with open(filepath, "w", encoding="utf-8") as f:
-            f.write(text)
\ No newline at end of file
+            f.write(text)
+
+    def save_text_chunks(self, chunks: Iterable[str], filepath: str, buffer_size: int = 1 << 20) -> None:
+        """
+        Write text piece by piece, so the whole file never sits in memory.
+
+        Small pieces are collected until about `buffer_size` characters and
+        written together.
+        """
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as f:
+            buffer, buffered = [], 0
+            for chunk in chunks:
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= buffer_size:
+                    f.write("".join(buffer))
+                    buffer, buffered = [], 0
+            f.write("".join(buffer))
+
+    @staticmethod
+    def _open_text(filepath: str, mode: str):
+        if filepath.endswith(".gz"):
+            return gzip.open(filepath, mode + "t", encoding="utf-8")
+        if filepath.endswith(".zst"):
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("Writing/reading .zst output requires `pip install zstandard`") from e
+            if mode == "w":
+                stream = zstandard.ZstdCompressor().stream_writer(open(filepath, "wb"))
+            else:
+                stream = zstandard.ZstdDecompressor().stream_reader(open(filepath, "rb"))
+            return io.TextIOWrapper(stream, encoding="utf-8")
+        return open(filepath, mode, encoding="utf-8")
+
+
+class JsonlWriter:
+    """Appends records to a (optionally .gz/.zst compressed) JSONL file."""
+
+    def __init__(self, filepath: str):
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        self.path = filepath
+        self.count = 0
+        self._file = DatasetLoader._open_text(filepath, "w")
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
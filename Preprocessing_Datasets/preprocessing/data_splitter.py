@@ -1,6 +1,9 @@
 # preprocessing/data_splitter.py
-from typing import List, Tuple, Any
-from sklearn.model_selection import train_test_split
+import hashlib
+import json
+import math
+import numbers
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 class DataSplitter:
     """
@@ -13,10 +16,24 @@ class DataSplitter:
     Example:
         total = 1000, test_size=0.15 → 850 train, 150 (val+test)
         val_ratio_of_test=0.48 → val = 72, test = 78
+
+    Modes:
+      - "random": seeded shuffle split (needs the whole list); same result
+        as scikit-learn's `train_test_split`, without importing it
+      - "hash": each record goes to the split picked by a stable hash of its
+        key and `random_state` (see `assign`). Same proportions in
+        expectation, deterministic across runs and sources, and adding
+        records never moves existing ones. `iter_split` streams this mode.
     """
 
-    def __init__(self, random_state: int = 42):
+    MODES = ("random", "hash")
+
+    def __init__(self, random_state: int = 42, mode: str = "random", key_fields: List[str] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}")
         self.random_state = random_state
+        self.mode = mode
+        self.key_fields = list(key_fields or [])
 
     def split(
         self,
@@ -40,21 +57,97 @@ class DataSplitter:
         if not (0 <= val_ratio_of_test <= 1):
             raise ValueError("val_ratio_of_test must be between 0 and 1")
 
+        if self.mode == "hash":
+            splits = {"train": [], "validation": [], "test": []}
+            for name, record in self.iter_split(data, test_size, val_ratio_of_test):
+                splits[name].append(record)
+            return splits["train"], splits["validation"], splits["test"]
+
         # First split: train vs (val + test)
-        train_data, val_test_data = train_test_split(
-            data,
-            test_size=test_size,
-            random_state=self.random_state
-        )
+        train_data, val_test_data = self.train_test_split(data, test_size, self.random_state)
 
         # Second split: val vs test
         if len(val_test_data) == 0:
             return train_data, [], []
 
-        val_data, test_data = train_test_split(
-            val_test_data,
-            test_size=val_ratio_of_test,
-            random_state=self.random_state
+        # float(): a config value of 0 or 1 is a proportion here, not a row count
+        val_data, test_data = self.train_test_split(val_test_data, float(val_ratio_of_test), self.random_state)
+
+        return train_data, val_data, test_data
+
+    @staticmethod
+    def train_test_split(data: List[Any], test_size: float, random_state: int = None) -> Tuple[List[Any], List[Any]]:
+        """
+        Shuffled two-way split, identical to
+        `sklearn.model_selection.train_test_split(data, test_size=..., random_state=...)`:
+        the first n_test items of a `RandomState(random_state)` permutation
+        are the test set, the rest train. As in sklearn, a float `test_size`
+        is a proportion (n_test = ceil(test_size * n)) and an int is a row
+        count. Only needs numpy; unlike sklearn, a side may come out empty.
+        """
+        import numpy as np
+
+        if isinstance(test_size, numbers.Integral) and not isinstance(test_size, bool):
+            if not (0 <= test_size <= len(data)):
+                raise ValueError(f"test_size={test_size} rows must be between 0 and {len(data)}")
+            n_test = int(test_size)
+        elif isinstance(test_size, numbers.Real) and 0 <= test_size <= 1:
+            n_test = math.ceil(test_size * len(data))
+        else:
+            raise ValueError(f"test_size must be a proportion between 0 and 1 or a row count, got {test_size!r}")
+        permutation = np.random.RandomState(random_state).permutation(len(data))
+        return (
+            [data[i] for i in permutation[n_test:]],
+            [data[i] for i in permutation[:n_test]],
         )
 
-        return train_data, val_data, test_data
\ No newline at end of file
+    def assign(
+        self,
+        key: str,
+        test_size: float = 0.15,
+        val_ratio_of_test: float = 0.48
+    ) -> str:
+        """
+        Assign one record to "train", "validation" or "test" from a stable hash
+        of `key` and `random_state`, in the proportions `split` produces.
+
+        Needs no other records, so streams can be split as they are read.
+        """
+        if not (0 < test_size < 1):
+            raise ValueError("test_size must be between 0 and 1")
+        if not (0 <= val_ratio_of_test <= 1):
+            raise ValueError("val_ratio_of_test must be between 0 and 1")
+
+        digest = hashlib.blake2b(f"{self.random_state}:{key}".encode("utf-8"), digest_size=8).digest()
+        position = int.from_bytes(digest, "big") / 2 ** 64
+        if position >= test_size:
+            return "train"
+        # Same orientation as `split`: val_ratio_of_test is the share of (val + test) that goes to test
+        return "test" if position < test_size * val_ratio_of_test else "validation"
+
+    def iter_split(
+        self,
+        records: Iterable[Dict[str, Any]],
+        test_size: float = 0.15,
+        val_ratio_of_test: float = 0.48
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (split name, record) for each record as it is read, using
+        `assign` on `record_key`. Holds no state, whatever `mode` is set.
+        """
+        for record in records:
+            yield self.assign(self.record_key(record), test_size, val_ratio_of_test), record
+
+    def record_key(self, record: Dict[str, Any]) -> str:
+        """
+        Hash key of a record: the configured `key_fields` (e.g. an id column)
+        when the record has them, else its content: the dialogue turns'
+        text or the instruction text.
+        """
+        if self.key_fields and all(field in record for field in self.key_fields):
+            return "\x1f".join(str(record[field]) for field in self.key_fields)
+        if "dialogue" in record:
+            return "\n".join(str(turn.get("text", "")) for turn in record["dialogue"])
+        if "instruction" in record:
+            return str(record["instruction"])
+        return json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
@@ -1,23 +1,95 @@
 # preprocessing/dataset_merger.py
+import itertools
+import os
+import pickle
 import random
-from typing import List, Tuple
+import tempfile
+from typing import Any, Iterable, Iterator, List, Tuple
 
 class DatasetMerger:
+    """
+    Merges per-source splits and shuffles them.
+
+    The shuffle is an external one: records are read in windows of
+    `window_size`, each window is shuffled in memory and written to a shard
+    on disk, and the shards are then interleaved by drawing the next record
+    from a shard with probability proportional to the records it has left.
+    That gives a uniform permutation while only one window (plus one
+    buffered record per shard) is held in memory. Inputs that fit in one
+    window never touch the disk.
+
+    The order is reproducible from `random_state`; each split gets its own
+    seed derived from it. `random_state=None` shuffles non-reproducibly.
+    """
+
+    def __init__(self, random_state: int = None, window_size: int = 100_000, spill_dir: str = None):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        self.random_state = random_state
+        self.window_size = window_size
+        self.spill_dir = spill_dir
+
     def merge_and_shuffle(
         self,
         train_sets: List[List],
         val_sets: List[List],
         test_sets: List[List]
     ) -> Tuple[List, List, List]:
-        merged_train = [item for subset in train_sets for item in subset]
-        merged_val = [item for subset in val_sets for item in subset]
-        merged_test = [item for subset in test_sets for item in subset]
+        merged_train = list(self.iter_shuffled(train_sets, "train"))
+        merged_val = list(self.iter_shuffled(val_sets, "validation"))
+        merged_test = list(self.iter_shuffled(test_sets, "test"))
+        return merged_train, merged_val, merged_test
 
-        random.shuffle(merged_train)
-        random.shuffle(merged_val)
-        random.shuffle(merged_test)
+    def iter_shuffled(self, sources: Iterable[Iterable[Any]], split: str = "") -> Iterator[Any]:
+        """Lazily yield the records of all `sources` in shuffled order."""
+        rng = self._rng(split)
+        records = self.chain_lists(sources)
+        window = list(itertools.islice(records, self.window_size))
+        if len(window) < self.window_size:
+            rng.shuffle(window)
+            yield from window
+            return
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.spill_dir) as shard_dir:
+            counts = []
+            while window:
+                rng.shuffle(window)
+                with open(os.path.join(shard_dir, f"{len(counts)}.pkl"), "wb") as f:
+                    for record in window:
+                        pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+                counts.append(len(window))
+                window = list(itertools.islice(records, self.window_size))
+            yield from self._interleave(shard_dir, counts, rng)
 
-        return merged_train, merged_val, merged_test
-    
     def merge_lists(self, list_of_lists):
-        return [item for sublist in list_of_lists for item in sublist if sublist]
\ No newline at end of file
+        return [item for sublist in list_of_lists for item in sublist if sublist]
+
+    @staticmethod
+    def chain_lists(list_of_lists: Iterable[Iterable[Any]]) -> Iterator[Any]:
+        """Lazy, copy-free `merge_lists`: yields items of each sublist in turn."""
+        return itertools.chain.from_iterable(sublist for sublist in list_of_lists if sublist)
+
+    @staticmethod
+    def _interleave(shard_dir: str, counts: List[int], rng: random.Random) -> Iterator[Any]:
+        shards = [open(os.path.join(shard_dir, f"{idx}.pkl"), "rb") for idx in range(len(counts))]
+        try:
+            remaining = sum(counts)
+            while remaining:
+                pick = rng.randrange(remaining)
+                for idx, count in enumerate(counts):
+                    if pick < count:
+                        break
+                    pick -= count
+                counts[idx] -= 1
+                remaining -= 1
+                yield pickle.load(shards[idx])
+        finally:
+            for shard in shards:
+                shard.close()
+
+    def _rng(self, split: str) -> random.Random:
+        if self.random_state is None:
+            return random.Random()
+        return random.Random(f"{self.random_state}:{split}")
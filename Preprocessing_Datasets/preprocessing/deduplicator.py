@@ -1,23 +1,102 @@
 # preprocessing/deduplicator.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 import logging
+from .digest_store import BYTES_PER_KEY, DigestStore, record_digest
+from .minhash import MinHashLSH
 
 class Deduplicator:
-    def __init__(self, logger: logging.Logger = None):
+    def __init__(
+        self,
+        logger: logging.Logger = None,
+        memory_budget_mb: float = None,
+        spill_dir: str = None
+    ):
+        """
+        Args:
+            logger: Optional logger for dedup stats.
+            memory_budget_mb: Memory for exact-dedup keys before they spill to
+                an on-disk SQLite store. None keeps every key in memory.
+            spill_dir: Directory for spill files (system temp dir if None).
+        """
         self.logger = logger
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_dir = spill_dir
+
+    def new_key_store(self) -> DigestStore:
+        """A key store that can be shared across `remove_duplicates` calls."""
+        max_in_memory = None
+        if self.memory_budget_mb:
+            max_in_memory = max(1, int(self.memory_budget_mb * 1024 * 1024 / BYTES_PER_KEY))
+        return DigestStore(max_in_memory=max_in_memory, spill_dir=self.spill_dir)
 
     def remove_duplicates(
+        self,
+        records: Iterable[Dict[str, Any]],
+        key_fields: List[str],
+        seen: DigestStore = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Drop records whose key fields exactly match an earlier record.
+
+        Keys are stored as 128-bit digests rather than the field text. Pass a
+        shared `seen` store (see `new_key_store`) to dedup across several
+        calls, e.g. across all instruction sources.
+        """
+        store = seen if seen is not None else self.new_key_store()
+        total = 0
+        unique = []
+        try:
+            for record in records:
+                total += 1
+                if store.add(record_digest(record, key_fields)):
+                    unique.append(record)
+        finally:
+            if seen is None:
+                store.close()
+        if self.logger:
+            spilled = f" ({store.spilled} keys spilled to disk)" if store.spilled else ""
+            self.logger.info(f"Deduplicated {total} → {len(unique)} records.{spilled}")
+        return unique
+
+    def remove_near_duplicates(
         self,
         records: List[Dict[str, Any]],
-        key_fields: List[str]
+        key_fields: List[str],
+        threshold: float = 0.8,
+        shingle_size: int = 5,
+        num_perm: int = 128,
+        seed: int = 42
     ) -> List[Dict[str, Any]]:
-        seen = set()
+        """
+        Drop records whose key fields are near-identical to an earlier record.
+
+        Uses MinHash signatures with LSH banding (see MinHashLSH), so each
+        record is compared only with the earlier records sharing a band
+        bucket. The first record of each cluster is kept.
+        """
+        lsh = MinHashLSH(num_perm=num_perm, threshold=threshold, shingle_size=shingle_size, seed=seed)
         unique = []
+        cluster_sizes = []
         for record in records:
-            key = tuple(record.get(field, "") for field in key_fields)
-            if key not in seen:
-                seen.add(key)
+            text = "\n".join(str(record.get(field, "")) for field in key_fields)
+            signature = lsh.signature(text)
+            if signature is None:
                 unique.append(record)
+                continue
+            match = lsh.query_or_insert(signature)
+            if match is None:
+                unique.append(record)
+                cluster_sizes.append(1)
+            else:
+                cluster_sizes[match] += 1
+
         if self.logger:
-            self.logger.info(f"Deduplicated {len(records)} → {len(unique)} records.")
-        return unique
\ No newline at end of file
+            clusters = [size for size in cluster_sizes if size > 1]
+            self.logger.info(
+                f"Near-deduplicated {len(records)} → {len(unique)} records "
+                f"(threshold={threshold}, shingle_size={shingle_size}, "
+                f"bands={lsh.bands}x{lsh.rows}): {len(clusters)} clusters, "
+                f"largest {max(clusters, default=0)}, "
+                f"{len(records) - len(unique)} near-duplicates removed."
+            )
+        return unique
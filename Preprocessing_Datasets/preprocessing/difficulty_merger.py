@@ -1,37 +1,65 @@
 # preprocessing/difficulty_merger.py
 import json
 from pathlib import Path
+from typing import Dict, Iterable, Iterator
 import logging
+from .data_loader import iter_json_records
+
+_MISSING = object()
 
 class DifficultyMerger:
     def __init__(self, logger: logging.Logger = None):
         self.logger = logger
 
+    def tag(self, records: Iterable[Dict], difficulty_path: str, source: str = "dataset") -> Iterator[Dict]:
+        """
+        Zip `records` with the labels in `difficulty_path`, yielding each
+        record with its instruction prefixed by `<difficulty>` ("unknown" once
+        the labels run out). Labels are read one at a time. An empty
+        instruction still takes its label but is not tagged, so formatting
+        drops the record as it would without labels.
+        """
+        difficulties = iter_json_records(difficulty_path)
+        count = labelled = 0
+        for item in records:
+            difficulty = next(difficulties, _MISSING)
+            if difficulty is _MISSING:
+                difficulty = "unknown"
+            else:
+                labelled += 1
+            if item["instruction"].strip():
+                item["instruction"] = f"<{difficulty}> {item['instruction']}"
+            count += 1
+            yield item
+
+        total_difficulties = labelled + sum(1 for _ in difficulties)
+        if count != total_difficulties:
+            msg = f"Length mismatch: dataset={count}, difficulties={total_difficulties}"
+            (self.logger.warning if self.logger else print)(f"⚠ {msg}")
+        if self.logger:
+            self.logger.info(f"Merged difficulty into {count} records from {source}")
+
+    def iter_merged(self, dataset_path: str, difficulty_path: str) -> Iterator[Dict]:
+        """`tag` over the records of `dataset_path`, read one at a time."""
+        return self.tag(iter_json_records(dataset_path), difficulty_path, source=dataset_path)
+
     def merge_difficulty_labels(
         self,
         dataset_path: str,
         difficulty_path: str,
         output_path: str
     ) -> str:
-        with open(dataset_path, encoding="utf-8") as f:
-            dataset = json.load(f)
-        with open(difficulty_path, encoding="utf-8") as f:
-            difficulties = json.load(f)
-
-        if len(dataset) != len(difficulties):
-            msg = f"Length mismatch: dataset={len(dataset)}, difficulties={len(difficulties)}"
-            (self.logger.warning if self.logger else print)(f"⚠ {msg}")
-
-        merged = []
-        for i, item in enumerate(dataset):
-            difficulty = difficulties[i] if i < len(difficulties) else "unknown"
-            item["instruction"] = f"<{difficulty}> {item['instruction']}"
-            merged.append(item)
-
+        """Write `iter_merged` to `output_path` as an indented JSON array and return the path."""
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        count = 0
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(merged, f, ensure_ascii=False, indent=2)
+            for item in self.iter_merged(dataset_path, difficulty_path):
+                # Same layout as json.dump(merged, indent=2)
+                f.write("[\n  " if count == 0 else ",\n  ")
+                f.write(json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                count += 1
+            f.write("\n]" if count else "[]")
 
         if self.logger:
-            self.logger.info(f"Merged difficulty into {len(merged)} records → {output_path}")
-        return output_path
\ No newline at end of file
+            self.logger.info(f"Wrote {count} difficulty-labelled records → {output_path}")
+        return output_path
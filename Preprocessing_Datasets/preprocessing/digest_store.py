@@ -0,0 +1,90 @@
+# preprocessing/digest_store.py
+import hashlib
+import os
+import sqlite3
+import tempfile
+from typing import Any, Dict, Iterable
+
+# Rough per-key cost of a 16-byte digest held in a Python set
+# (bytes object + hash table slot), used to turn a MB budget into a key count.
+BYTES_PER_KEY = 96
+
+
+def record_digest(record: Dict[str, Any], key_fields: Iterable[str]) -> bytes:
+    """128-bit BLAKE2b digest of a record's key fields (length-prefixed, so unambiguous)."""
+    h = hashlib.blake2b(digest_size=16)
+    for field in key_fields:
+        value = record.get(field, "")
+        data = value.encode("utf-8") if isinstance(value, str) else b"\0" + repr(value).encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.digest()
+
+
+class DigestStore:
+    """
+    Set of fixed-width digests with a memory budget.
+
+    Digests are kept in an in-memory set until it holds `max_in_memory`
+    keys; the set is then spilled into a temporary SQLite table (primary
+    key on the digest) and lookups check memory first, then disk.
+
+    Example:
+        with DigestStore(max_in_memory=1_000_000) as seen:
+            unique = [r for r in records if seen.add(record_digest(r, fields))]
+    """
+
+    def __init__(self, max_in_memory: int = None, spill_dir: str = None):
+        self.max_in_memory = max_in_memory
+        self.spill_dir = spill_dir
+        self._memory = set()
+        self._db = None
+        self._db_path = None
+        self.spilled = 0
+
+    def add(self, digest: bytes) -> bool:
+        """Add `digest`; return True if it was not already present."""
+        if digest in self._memory:
+            return False
+        if self._db is not None and self._db.execute(
+            "SELECT 1 FROM digests WHERE digest = ?", (digest,)
+        ).fetchone():
+            return False
+        self._memory.add(digest)
+        if self.max_in_memory and len(self._memory) >= self.max_in_memory:
+            self._spill()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._memory) + self.spilled
+
+    def close(self) -> None:
+        self._memory.clear()
+        if self._db is not None:
+            self._db.close()
+            os.remove(self._db_path)
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spill(self) -> None:
+        if self._db is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self._db_path = tempfile.mkstemp(suffix=".sqlite", dir=self.spill_dir)
+            os.close(fd)
+            self._db = sqlite3.connect(self._db_path)
+            self._db.execute("PRAGMA journal_mode = OFF")
+            self._db.execute("PRAGMA synchronous = OFF")
+            self._db.execute("CREATE TABLE digests (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        # Sorted inserts keep B-tree page splits sequential
+        self._db.executemany(
+            "INSERT OR IGNORE INTO digests VALUES (?)", ((d,) for d in sorted(self._memory))
+        )
+        self._db.commit()
+        self.spilled += len(self._memory)
+        self._memory.clear()
@@ -1,7 +1,9 @@
 # preprocessing/formatters/dialogue_formatter.py
-from typing import Any, Dict, List
+import logging
+from typing import Any, Dict, Iterable, Iterator, List
 from collections import defaultdict
 from .base_formatter import BaseFormatter
+from ..logger_factory import LogSampler
 
 class DialogueFormatter(BaseFormatter):
     def __init__(self, logger=None):
@@ -16,9 +18,28 @@ class DialogueFormatter(BaseFormatter):
         else:
             raise ValueError(f"Unsupported dialogue dataset: {source}")
 
+    def iter_records(self, dataset_config: Dict, records: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Lazily format a stream of records (e.g. a cleaned IterableDataset).
+
+        DailyDialog utterances are grouped by runs of consecutive `id_key`
+        values, so the stream must keep each dialogue's rows together, as
+        the Hub dataset does.
+        """
+        source = dataset_config["name"]
+        if "persona-chat" in source:
+            return self._iter_persona_chat(records, dataset_config)
+        elif "daily_dialog" in source or "better_daily_dialog" in source:
+            return self._iter_daily_dialog(records, dataset_config)
+        else:
+            raise ValueError(f"Unsupported dialogue dataset: {source}")
+
     def _format_persona_chat(self, records, config: Dict) -> List[Dict]:
-        dialogues = []
+        return list(self._iter_persona_chat(records, config))
+
+    def _iter_persona_chat(self, records, config: Dict) -> Iterator[Dict]:
         prefix_map = config["role_prefixes"]
+        sampler = LogSampler(self.logger)
         for record in records:
             utterances = []
             for line in record[config["text_key"]]:
@@ -28,25 +49,72 @@ class DialogueFormatter(BaseFormatter):
                         utterances.append({"role": role, "text": text})
                         break
                 else:
-                    if self.logger:
-                        self.logger.debug(f"Unrecognized line: {line}...")
+                    sampler.log("Unrecognized line", logging.DEBUG, "Unrecognized line: %.80s...", line)
             if utterances:
-                dialogues.append({"source": config["name"], "dialogue": utterances})
-        return dialogues
+                yield {"source": config["name"], "dialogue": utterances}
+        sampler.summarize()
 
     def _format_daily_dialog(self, dataset, subset: str, config: Dict) -> List[Dict]:
         grouped = self._group_by_id(dataset, subset, config["id_key"], config["text_key"])
-        dialogues = []
-        for dialog_id, utterances in grouped.items():
-            dialogue = []
-            for idx, text in enumerate(utterances):
-                role = "user" if idx % 2 == 0 else "bot"
-                dialogue.append({"role": role, "text": text})
-            dialogues.append({"source": config["name"], "dialogue": dialogue})
-        return dialogues
+        return [self._daily_dialogue(utterances, config) for utterances in grouped.values()]
+
+    def _iter_daily_dialog(self, records, config: Dict) -> Iterator[Dict]:
+        id_key, text_key = config["id_key"], config["text_key"]
+        current_id, utterances = None, []
+        for record in records:
+            if utterances and record[id_key] != current_id:
+                yield self._daily_dialogue(utterances, config)
+                utterances = []
+            current_id = record[id_key]
+            utterances.append(record[text_key])
+        if utterances:
+            yield self._daily_dialogue(utterances, config)
+
+    @staticmethod
+    def _daily_dialogue(utterances: List[str], config: Dict) -> Dict:
+        dialogue = [
+            {"role": "user" if idx % 2 == 0 else "bot", "text": text}
+            for idx, text in enumerate(utterances)
+        ]
+        return {"source": config["name"], "dialogue": dialogue}
 
     def _group_by_id(self, dataset, subset: str, id_key: str, text_key: str) -> Dict[str, List[str]]:
+        records = dataset[subset]
+        if hasattr(records, "with_format"):
+            return self._group_by_id_arrow(records, id_key, text_key)
         dialogues = defaultdict(list)
-        for record in dataset[subset]:
+        for record in records:
             dialogues[record[id_key]].append(record[text_key])
-        return dict(dialogues)
\ No newline at end of file
+        return dict(dialogues)
+
+    def _group_by_id_arrow(
+        self, records, id_key: str, text_key: str, batch_size: int = 100_000
+    ) -> Dict[str, List[str]]:
+        """
+        Group utterances by id from Arrow column batches, without decoding rows.
+
+        Utterances of one dialogue are stored in consecutive rows, so each batch
+        is cut at the positions where the id changes and every run is appended
+        in one step. Runs of the same id that are not adjacent (or that span a
+        batch boundary) still land in the same group, in row order.
+        """
+        import pyarrow.compute as pc
+
+        dialogues = {}
+        arrow_records = records.select_columns([id_key, text_key]).with_format("arrow")
+        for batch in arrow_records.iter(batch_size=batch_size):
+            ids = batch.column(id_key)
+            if len(ids) == 0:
+                continue
+            changed = pc.fill_null(pc.not_equal(ids.slice(1), ids.slice(0, len(ids) - 1)), True)
+            starts = [0] + [i + 1 for i in pc.indices_nonzero(changed).to_pylist()]
+            ends = starts[1:] + [len(ids)]
+            id_values = pc.take(ids, starts).to_pylist()
+            texts = batch.column(text_key).to_pylist()
+            for dialog_id, start, end in zip(id_values, starts, ends):
+                run = texts[start:end]
+                if dialog_id in dialogues:
+                    dialogues[dialog_id].extend(run)
+                else:
+                    dialogues[dialog_id] = run
+        return dialogues
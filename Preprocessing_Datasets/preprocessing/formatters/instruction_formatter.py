@@ -8,12 +8,12 @@ class InstructionFormatter(BaseFormatter):
 
     def format_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         formatted = []
+        skipped = 0
         for item in records:
             instruction = item.get("instruction", "").strip()
             output = item.get("output", "").strip()
             if not instruction or not output:
-                if self.logger:
-                    self.logger.debug("Skipped record with empty instruction or output.")
+                skipped += 1
                 continue
             formatted.append({
                 "source": "instruction_dataset",
@@ -21,5 +21,7 @@ class InstructionFormatter(BaseFormatter):
                 "output": output
             })
         if self.logger:
-            self.logger.info(f"Formatted {len(formatted)} instruction records.")
+            if skipped:
+                self.logger.debug("Skipped %d record(s) with empty instruction or output.", skipped)
+            self.logger.info("Formatted %d instruction records.", len(formatted))
         return formatted
\ No newline at end of file
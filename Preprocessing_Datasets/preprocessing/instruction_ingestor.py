@@ -0,0 +1,140 @@
+# preprocessing/instruction_ingestor.py
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+
+class InstructionIngestor:
+    """
+    Load → clean → format → dedup for one local instruction source.
+
+    Holds only picklable services, so `ingest` can run in worker processes;
+    sources are independent and cleaning is CPU-bound regex work. See
+    `run_all` for the parallel mode.
+    """
+
+    def __init__(
+        self,
+        loader,
+        cleaner,
+        formatter,
+        deduplicator,
+        difficulty_merger,
+        near_dedup_cfg: Dict = None,
+        seed: int = 42,
+        logger: logging.Logger = None
+    ):
+        self.loader = loader
+        self.cleaner = cleaner
+        self.formatter = formatter
+        self.deduplicator = deduplicator
+        self.difficulty_merger = difficulty_merger
+        self.near_dedup_cfg = near_dedup_cfg or {}
+        self.seed = seed
+        self.logger = logger
+
+    def ingest(self, source: Dict) -> Tuple[Optional[List[Dict]], Dict[str, Any]]:
+        """
+        Returns (records, stats); records is None when the source is skipped.
+        `stats` has the loaded/kept record counts and wall/CPU seconds.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        stats = {"path": source["path"], "loaded": 0, "kept": 0}
+        records = self._ingest(source, stats)
+        stats["kept"] = len(records) if records is not None else 0
+        stats["seconds"] = round(time.perf_counter() - wall, 3)
+        stats["cpu_seconds"] = round(time.process_time() - cpu, 3)
+        return records, stats
+
+    def run_all(
+        self,
+        sources: List[Dict],
+        workers: int = 1,
+        cached: Callable[[int], bool] = None
+    ) -> List[Callable[[], Tuple[Optional[List[Dict]], Dict[str, Any]]]]:
+        """
+        Start ingesting every source and return one zero-argument callable per
+        source, in config order, that returns its `ingest` result.
+
+        With workers > 1 the sources run in a process pool; waiting on the
+        callables in order keeps the merge deterministic. Sources for which
+        `cached(index)` is true are not submitted (their callables ingest
+        inline if ever called).
+        """
+        if workers <= 1 or len(sources) <= 1:
+            return [lambda source=source: self.ingest(source) for source in sources]
+
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(sources)))
+        futures = {
+            idx: executor.submit(self.ingest, source)
+            for idx, source in enumerate(sources)
+            if cached is None or not cached(idx)
+        }
+        executor.shutdown(wait=False)
+        calls = []
+        for idx, source in enumerate(sources):
+            if idx in futures:
+                calls.append(futures[idx].result)
+            else:
+                calls.append(lambda source=source: self.ingest(source))
+        return calls
+
+    def _ingest(self, source: Dict, stats: Dict[str, Any]) -> Optional[List[Dict]]:
+        raw_path = source["path"]
+        self._log(f"Processing local file: {raw_path}")
+
+        # Load data, one record at a time
+        records = self.loader.iter_json_records(raw_path)
+        first = next(records, None)
+        if first is None:
+            self._log(f"Skipping empty file: {raw_path}", logging.WARNING)
+            return None
+
+        # Validate structure
+        if not ("instruction" in first and "output" in first):
+            self._log(f"Invalid format in {raw_path}. Skipping.", logging.ERROR)
+            records.close()
+            return None
+
+        self._log(f"Processing records from Local:{raw_path}")
+
+        # Clean (lazily, so raw records are never all in memory)
+        cleaned = (
+            {
+                "instruction": self.cleaner.clean_instruction_text(item.get("instruction", "")),
+                "output": self.cleaner.clean_instruction_text(item.get("output", ""))
+            }
+            for item in self._count(itertools.chain([first], records), stats)
+        )
+
+        # Difficulty labels are zipped into the cleaned stream (no temp file), after
+        # cleaning so the `<difficulty>` tag is not stripped as HTML
+        if source.get("type", source.get("processing_type")) == "with_difficulty":
+            cleaned = self.difficulty_merger.tag(cleaned, source["difficulty_file"], source=raw_path)
+
+        # Format and deduplicate
+        formatted = self.formatter.format_records(cleaned)
+        self.cleaner.log_summary()
+        deduped = self.deduplicator.remove_duplicates(formatted, ["instruction", "output"])
+        if self.near_dedup_cfg.get("enabled", False):
+            deduped = self.deduplicator.remove_near_duplicates(
+                deduped,
+                ["instruction", "output"],
+                threshold=self.near_dedup_cfg.get("threshold", 0.8),
+                shingle_size=self.near_dedup_cfg.get("shingle_size", 5),
+                num_perm=self.near_dedup_cfg.get("num_perm", 128),
+                seed=self.seed
+            )
+        return deduped
+
+    @staticmethod
+    def _count(records: Iterable[Dict], stats: Dict[str, Any]) -> Iterator[Dict]:
+        for record in records:
+            stats["loaded"] += 1
+            yield record
+
+    def _log(self, message: str, level: int = logging.INFO) -> None:
+        if self.logger:
+            self.logger.log(level, message)
@@ -3,6 +3,16 @@ import re
 from typing import Any, Dict, List, Callable
 from .constants import DIALOUGE_And_PERSONA_SCANNING_PATTERNS
 
+# Substrings a default pattern cannot match without (any one suffices).
+# Texts lacking all of them skip that pattern's regex scan entirely.
+_REQUIRED_SUBSTRINGS = {
+    "html_tags": ("<",),
+    "urls": ("://", "."),
+    "emails": ("@",),
+    "broken_contractions": ("'", "’"),
+    "spaced_hyphens": ("-",),
+}
+
 class IssueScanner:
     """
     Scans datasets for text quality issues using regex patterns.
@@ -10,6 +20,10 @@ class IssueScanner:
     Supports both:
       - Dialogue datasets (list of utterances per record)
       - Instruction datasets (single instruction/output per record)
+
+    When `verbose` is off only presence per category is needed, so each
+    pattern stops at its first hit (`search`) and patterns whose required
+    substring is absent from the text are not run at all.
       
     Designed for auditing — not part of core transformation pipeline.
     """
@@ -21,6 +35,10 @@ class IssueScanner:
     ):
         self.patterns = patterns or DIALOUGE_And_PERSONA_SCANNING_PATTERNS
         self.logger = logger
+        self._rules = [
+            (issue_name, pattern.search, self._required_substrings(issue_name, pattern))
+            for issue_name, pattern in self.patterns.items()
+        ]
         
     def scan_by_dataset_name(self, data_source: str, dataset, subset: str, verbose: bool):
         if "persona-chat" in data_source:
@@ -64,6 +82,19 @@ class IssueScanner:
             self.logger.info(f"Instruction scan complete. Issues: {issue_counts}")
         return issue_counts
 
+    def scan_texts(
+        self,
+        texts: List[str],
+        record_id: str = "unknown",
+        verbose: bool = False
+    ) -> Dict[str, int]:
+        """Scan the texts of a single record; non-string entries are skipped."""
+        issue_counts = {}
+        for text in texts:
+            if isinstance(text, str):
+                self._scan_text(text, issue_counts, record_id, verbose)
+        return issue_counts
+
     def _scan_dataset(
         self,
         dataset: Any,
@@ -87,11 +118,30 @@ class IssueScanner:
         return issue_counts
 
     def _scan_text(self, text: str, counts: dict, record_id: str, verbose: bool):
+        if verbose and self.logger:
+            self._scan_text_verbose(text, counts, record_id)
+            return
+        for issue_name, search, needles in self._rules:
+            if needles is not None:
+                for needle in needles:
+                    if needle in text:
+                        break
+                else:
+                    continue
+            if search(text) is not None:
+                counts[issue_name] = counts.get(issue_name, 0) + 1
+
+    def _scan_text_verbose(self, text: str, counts: dict, record_id: str):
         for issue_name, pattern in self.patterns.items():
             matches = pattern.findall(text)
             if matches:
                 counts[issue_name] = counts.get(issue_name, 0) + 1
-                if verbose and self.logger:
-                    self.logger.info(
-                        f"Issue '{issue_name}' in {record_id}: {matches} | Text: {text}..."
-                    )
\ No newline at end of file
+                self.logger.info(
+                    f"Issue '{issue_name}' in {record_id}: {matches} | Text: {text}..."
+                )
+
+    @staticmethod
+    def _required_substrings(issue_name: str, pattern: re.Pattern):
+        if pattern != DIALOUGE_And_PERSONA_SCANNING_PATTERNS.get(issue_name):
+            return None
+        return _REQUIRED_SUBSTRINGS.get(issue_name)
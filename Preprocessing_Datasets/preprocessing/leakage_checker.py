@@ -0,0 +1,126 @@
+# preprocessing/leakage_checker.py
+import hashlib
+import re
+from typing import Any, Dict, List, Tuple
+import logging
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class LeakageChecker:
+    """
+    Finds validation/test rows that leak from the train split.
+
+    Two checks, both linear in the total number of records:
+      - exact: digest of the normalised record text (lower-cased, whitespace
+        collapsed) is also present in train
+      - n-gram (optional): at least `ngram_threshold` of an eval row's word
+        n-grams occur somewhere in train. Only the eval n-grams are indexed
+        and train is streamed against them, so memory follows the (small)
+        eval splits rather than train.
+
+    Works on dialogue records ({"dialogue": [{"text": ...}]}) and
+    instruction records ({"instruction": ..., "output": ...}) alike.
+    """
+
+    def __init__(
+        self,
+        action: str = "remove",
+        ngram_size: int = 13,
+        ngram_threshold: float = None,
+        logger: logging.Logger = None
+    ):
+        if action not in ("remove", "report"):
+            raise ValueError("action must be 'remove' or 'report'")
+        if ngram_threshold is not None and not (0 < ngram_threshold <= 1):
+            raise ValueError("ngram_threshold must be in (0, 1]")
+        self.action = action
+        self.ngram_size = ngram_size
+        self.ngram_threshold = ngram_threshold
+        self.logger = logger
+
+    def check(
+        self,
+        train: List[Dict[str, Any]],
+        validation: List[Dict[str, Any]],
+        test: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict], List[Dict], List[Dict], Dict[str, Dict[str, int]]]:
+        """
+        Returns:
+            Tuple of (train, validation, test, report). With action "remove"
+            contaminated eval rows are dropped; with "report" the splits are
+            returned unchanged. `report` has exact/ngram/total counts per
+            eval split.
+        """
+        eval_splits = {"validation": validation, "test": test}
+        leaked = {name: self._exact_leaks(train, rows) for name, rows in eval_splits.items()}
+        report = {name: {"exact": len(indices)} for name, indices in leaked.items()}
+
+        if self.ngram_threshold is not None:
+            ngram_leaks = self._ngram_leaks(train, eval_splits, leaked)
+            for name, indices in ngram_leaks.items():
+                report[name]["ngram"] = len(indices)
+                leaked[name] |= indices
+
+        for name, rows in eval_splits.items():
+            report[name]["total"] = len(leaked[name])
+            report[name]["rows"] = len(rows)
+            if self.logger:
+                self.logger.info(
+                    f"[LEAKAGE] {name}: {len(leaked[name])}/{len(rows)} rows overlap train "
+                    f"{report[name]} → {'removed' if self.action == 'remove' else 'reported only'}"
+                )
+
+        if self.action == "remove":
+            validation, test = (
+                [row for idx, row in enumerate(rows) if idx not in leaked[name]]
+                for name, rows in eval_splits.items()
+            )
+        return train, validation, test, report
+
+    @staticmethod
+    def record_text(record: Dict[str, Any]) -> str:
+        if "dialogue" in record:
+            return "\n".join(str(turn.get("text", "")) for turn in record["dialogue"])
+        return f"{record.get('instruction', '')}\n{record.get('output', '')}"
+
+    def _digest(self, record: Dict[str, Any]) -> bytes:
+        text = " ".join(self.record_text(record).lower().split())
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _exact_leaks(self, train: List[Dict], rows: List[Dict]) -> set:
+        train_digests = {self._digest(record) for record in train}
+        return {idx for idx, record in enumerate(rows) if self._digest(record) in train_digests}
+
+    def _ngrams(self, record: Dict[str, Any]) -> set:
+        tokens = _TOKEN_PATTERN.findall(self.record_text(record).lower())
+        n = self.ngram_size
+        if len(tokens) < n:
+            return {hash(tuple(tokens))} if tokens else set()
+        return {hash(tuple(tokens[i:i + n])) for i in range(len(tokens) - n + 1)}
+
+    def _ngram_leaks(self, train: List[Dict], eval_splits: Dict[str, List[Dict]], skip: Dict[str, set]) -> Dict[str, set]:
+        # Index eval n-grams → rows containing them; rows already caught as exact leaks are skipped
+        index = {}
+        totals = {}
+        for name, rows in eval_splits.items():
+            for idx, record in enumerate(rows):
+                if idx in skip[name]:
+                    continue
+                grams = self._ngrams(record)
+                if grams:
+                    totals[(name, idx)] = len(grams)
+                    for gram in grams:
+                        index.setdefault(gram, []).append((name, idx))
+
+        matched = {}
+        for record in train:
+            for gram in self._ngrams(record) & index.keys():
+                for row in index.pop(gram):
+                    matched[row] = matched.get(row, 0) + 1
+
+        leaks = {name: set() for name in eval_splits}
+        for (name, idx), count in matched.items():
+            if count / totals[(name, idx)] >= self.ngram_threshold:
+                leaks[name].add(idx)
+        return leaks
@@ -1,32 +1,65 @@
 # preprocessing/logger.py
+import atexit
 import logging
+import os
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from queue import SimpleQueue
+from typing import Dict, List
+
+# Loggers in queue mode: name → (listener, the handlers it writes to)
+_listeners: Dict[str, tuple] = {}
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    QueueHandler for a queue read in this process: only merges the message
+    arguments (which the caller may still mutate) and leaves timestamps,
+    exceptions and the final formatting to the listener thread, instead of
+    formatting and copying every record on the logging thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
 def setup_logger(
     name: str = "Preprocessing",
     level: str = "INFO",
     log_format: str = None,
     log_file: str = None,
-    console: bool = True  # <-- NEW: control console output
+    console: bool = True,  # <-- NEW: control console output
+    queue: bool = False
     ) -> logging.Logger:
-    
+    """
+    With `queue`, the logger only puts records on an in-memory queue and a
+    background QueueListener thread formats and writes them, so logging
+    calls never wait on file or console I/O. Call `stop_logger` (also run at
+    exit) to flush the queue. A process forked while the listener runs logs
+    straight to the handlers instead, since the listener thread is not
+    copied into it.
+    """
     logger = logging.getLogger(name)
 
     # Clear existing handlers to avoid duplication
+    stop_logger(logger)
     logger.handlers.clear()
 
     logger.setLevel(getattr(logging, level.upper()))
     formatter = logging.Formatter(
         log_format or "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
+    handlers: List[logging.Handler] = []
 
     #Console handler (optional)
     if console:
         ch = logging.StreamHandler(sys.stdout)
         ch.setLevel(getattr(logging, level.upper()))
         ch.setFormatter(formatter)
-        logger.addHandler(ch)
+        handlers.append(ch)
 
     # File handler (if specified)
     if log_file:
@@ -35,7 +68,107 @@ def setup_logger(
         fh = logging.FileHandler(log_path, encoding='utf-8')  # ← important: UTF-8 for emojis/special chars
         fh.setLevel(getattr(logging, level.upper()))
         fh.setFormatter(formatter)
-        logger.addHandler(fh)
+        handlers.append(fh)
+
+    if queue and handlers:
+        log_queue = SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = (listener, handlers)
+        logger.addHandler(_InProcessQueueHandler(log_queue))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
     logger.propagate = False
-    return logger
\ No newline at end of file
+    return logger
+
+
+def stop_logger(logger: logging.Logger) -> None:
+    """Flush a queue-mode logger and switch it back to writing synchronously; no-op otherwise."""
+    entry = _listeners.pop(logger.name, None)
+    if entry is None:
+        return
+    listener, handlers = entry
+    listener.stop()  # drains the queue
+    _use_handlers(logger, handlers)
+
+
+def _use_handlers(logger: logging.Logger, handlers: List[logging.Handler]) -> None:
+    logger.handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)] + handlers
+
+
+def _before_fork() -> None:
+    # Hold the handlers' locks so the fork never lands while the listener
+    # thread is half-way through writing (the child would inherit the
+    # stream's lock held, and block on its first record)
+    for _, handlers in _listeners.values():
+        for handler in handlers:
+            handler.acquire()
+
+
+def _after_fork_in_parent() -> None:
+    for _, handlers in _listeners.values():
+        for handler in handlers:
+            handler.release()
+
+
+def _after_fork_in_child() -> None:
+    # The listener thread does not exist in a forked child: log directly
+    # there. `logging` itself gives the child fresh handler locks.
+    for name, (_, handlers) in list(_listeners.items()):
+        _use_handlers(logging.getLogger(name), handlers)
+    _listeners.clear()
+
+
+def _stop_all() -> None:
+    for name in list(_listeners):
+        stop_logger(logging.getLogger(name))
+
+
+atexit.register(_stop_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child
+    )
+
+
+class LogSampler:
+    """
+    Per-record log events in hot loops: the first `samples` events of each
+    kind are logged (lazily, %-style), the rest are only counted, and
+    `summarize` logs the totals, at each kind's own level. Nothing is
+    formatted when the level is disabled.
+
+    Example:
+        sampler = LogSampler(logger)
+        for line in lines:
+            ...
+            sampler.log("unrecognized line", logging.DEBUG, "Unrecognized line: %.80s", line)
+        sampler.summarize()
+    """
+
+    def __init__(self, logger: logging.Logger = None, samples: int = 5):
+        self.logger = logger
+        self.samples = samples
+        self.counts: Dict[str, int] = {}
+        self.levels: Dict[str, int] = {}
+
+    def log(self, kind: str, level: int, msg: str, *args) -> None:
+        count = self.counts.get(kind, 0) + 1
+        self.counts[kind] = count
+        self.levels[kind] = level
+        if count > self.samples or not self.logger or not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(level, msg, *args)
+        if count == self.samples:
+            self.logger.log(level, "Further '%s' events are counted, not logged.", kind)
+
+    def summarize(self) -> None:
+        """Log how often each kind occurred (when more than were logged), then reset."""
+        if self.logger:
+            for kind, count in self.counts.items():
+                if count > self.samples:
+                    self.logger.log(self.levels[kind], "%s: %d event(s), %d logged.", kind, count, self.samples)
+        self.counts = {}
+        self.levels = {}
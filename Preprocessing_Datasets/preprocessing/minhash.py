@@ -0,0 +1,107 @@
+# preprocessing/minhash.py
+import re
+import zlib
+from typing import List, Optional, Tuple
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def optimal_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm whose LSH S-curve
+    threshold (1 / bands) ** (1 / rows) is closest to `threshold`.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashLSH:
+    """
+    MinHash signatures over word shingles with LSH banding.
+
+    Texts are lower-cased and tokenised on word characters, so differences
+    in whitespace and punctuation disappear before shingling; a renamed
+    variable only changes the shingles that contain it. Each signature is
+    split into bands and a record is only compared with the records sharing
+    at least one of its band buckets (each candidate once), which keeps
+    lookups roughly constant per record.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        threshold: float = 0.8,
+        shingle_size: int = 5,
+        seed: int = 42
+    ):
+        if not (0 < threshold <= 1):
+            raise ValueError("threshold must be in (0, 1]")
+        if num_perm < 2:
+            raise ValueError("num_perm must be at least 2")
+        if shingle_size < 1:
+            raise ValueError("shingle_size must be at least 1")
+
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = optimal_bands(num_perm, threshold)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._buckets = [{} for _ in range(self.bands)]  # band key → ids, in insertion order
+        self._signatures = []
+
+    def shingles(self, text: str) -> List[int]:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if not tokens:
+            return []
+        k = self.shingle_size
+        if len(tokens) <= k:
+            return [zlib.crc32(" ".join(tokens).encode("utf-8"))]
+        return list({
+            zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8"))
+            for i in range(len(tokens) - k + 1)
+        })
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of `text`, or None if it has no tokens."""
+        hashes = self.shingles(text)
+        if not hashes:
+            return None
+        values = np.asarray(hashes, dtype=np.uint64)[:, None]
+        permuted = (values * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def query_or_insert(self, signature: np.ndarray) -> Optional[int]:
+        """
+        Return the id of an indexed signature whose estimated Jaccard
+        similarity is at least `threshold`; otherwise index `signature`
+        under a new id and return None.
+        """
+        keys = [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+        checked = set()
+        for band, key in enumerate(keys):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+
+        new_id = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(new_id)
+        return None
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
 
 class BaseModelFormatter(ABC):
     @abstractmethod
     def format_for_model(self, records: list) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def iter_format_for_model(self, records: Iterable) -> Iterator[str]:
+        """Pieces that concatenate to `format_for_model(records)`; override to avoid building it whole."""
+        yield self.format_for_model(list(records))
@@ -1,4 +1,5 @@
 from .base_model_formatter import BaseModelFormatter
+from typing import Iterable, Iterator
 import logging
 
 class DialogueModelFormatter(BaseModelFormatter):
@@ -6,15 +7,19 @@ class DialogueModelFormatter(BaseModelFormatter):
         self.logger = logger
 
     def format_for_model(self, conversations: list) -> str:
-        if not conversations:
-            if self.logger:
-                self.logger.warning("No conversations to format.")
-            return ""
+        return "".join(self.iter_format_for_model(conversations))
 
-        lines = []
+    def iter_format_for_model(self, conversations: Iterable[dict]) -> Iterator[str]:
+        """
+        Yield the formatted text one conversation at a time; the pieces
+        concatenate to `format_for_model(conversations)`.
+        """
+        count = 0
         total_turns = 0
+        skipped = 0
 
         for conv in conversations:
+            lines = []
             dialogue = conv.get("dialogue", [])
             for turn in dialogue:
                 role = turn.get("role", "").upper()
@@ -22,11 +27,26 @@ class DialogueModelFormatter(BaseModelFormatter):
                 if text:
                     lines.append(f"{role}: {text}")
                     total_turns += 1
-                elif self.logger:
-                    self.logger.debug("Skipped empty utterance.")
+                else:
+                    skipped += 1
 
             lines.append("")  # blank line between conversations
+            yield ("\n" if count else "") + "\n".join(lines)
+            count += 1
 
         if self.logger:
-            self.logger.info(f"Formatted {len(conversations)} conversations with {total_turns} turns.")
-        return "\n".join(lines)
\ No newline at end of file
+            if not count:
+                self.logger.warning("No conversations to format.")
+            else:
+                self.logger.info("Formatted %d conversations with %d turns.", count, total_turns)
+            if skipped:
+                self.logger.debug("Skipped %d empty utterance(s).", skipped)
+
+    def iter_documents(self, conversations: Iterable[dict]) -> Iterator[str]:
+        """One text per conversation, its turns formatted as in `format_for_model`."""
+        for conv in conversations:
+            yield "\n".join(
+                f"{turn.get('role', '').upper()}: {turn.get('text', '').strip()}"
+                for turn in conv.get("dialogue", [])
+                if turn.get("text", "").strip()
+            )
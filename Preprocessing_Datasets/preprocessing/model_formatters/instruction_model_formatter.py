@@ -1,4 +1,5 @@
 from .base_model_formatter import BaseModelFormatter
+from typing import Iterable, Iterator
 import logging
 
 class InstructionModelFormatter(BaseModelFormatter):
@@ -6,9 +7,16 @@ class InstructionModelFormatter(BaseModelFormatter):
         self.logger = logger
 
     def format_for_model(self, records: list) -> str:
-        lines = []
+        return "".join(self.iter_format_for_model(records))
+
+    def iter_format_for_model(self, records: Iterable[dict]) -> Iterator[str]:
+        """Yield the formatted text one record at a time; the pieces concatenate to `format_for_model(records)`."""
+        first = True
+        for record in records:
+            yield ("" if first else "\n") + f"question: {record['instruction']}\nanswer: {record['output']}\n"
+            first = False
+
+    def iter_documents(self, records: Iterable[dict]) -> Iterator[str]:
+        """One text per record, formatted as in `format_for_model`."""
         for record in records:
-            lines.append(f"question: {record['instruction']}")
-            lines.append(f"answer: {record['output']}")
-            lines.append("")
-        return "\n".join(lines)
\ No newline at end of file
+            yield f"question: {record['instruction']}\nanswer: {record['output']}"
@@ -0,0 +1,482 @@
+# preprocessing/pipeline_tasks.py
+import itertools
+import os
+from typing import Any, Dict, List, Optional
+import logging
+from .data_loader import DatasetLoader
+from .data_splitter import DataSplitter
+from .dataset_merger import DatasetMerger
+from .leakage_checker import LeakageChecker
+from .stage_cache import code_version, file_digest
+
+SPLITS = ("train", "validation", "test")
+
+
+class PipelineTasks:
+    """
+    The tasks a `pipeline.stages` entry can name, bound to one run's config,
+    stage cache, profiler and logger.
+
+    A task is called as `tasks(stage, inputs)`: `stage` is the config entry
+    (its `name` doubles as the cache and profile stage name) and `inputs`
+    are the results of the stages in its `after` list, in that order.
+
+    In-memory tasks pass split sets along: {"key": ..., "splits": {name: records}},
+    where "key" is the cache key the records derive from (or a split → key
+    dict, for per-subset results). Streaming tasks pass {"paths": {split: file}}.
+    Returning None means the stage produced nothing (e.g. tokenizing is
+    disabled); the stages after it are skipped.
+
+    Modules only some tasks need are imported inside those tasks, so a run
+    of the instruction stages never imports Hugging Face `datasets`.
+
+    THREAD_TASKS only move records around; under the "process" executor
+    they still default to a thread next to their inputs, since shipping
+    the records to a worker would cost more than the task itself.
+    """
+
+    TASKS = (
+        "load", "clean_format", "split", "merge", "leakage", "save", "model_format", "tokenize",
+        "instruction_ingest", "merge_instruction",
+        "stream", "stream_merge", "stream_model_format", "stream_tokenize",
+    )
+    THREAD_TASKS = ("split", "merge", "save", "merge_instruction")
+
+    def __init__(self, config, output_dir: str, cache, profiler, logger: logging.Logger = None):
+        self.config = config
+        self.output_dir = output_dir
+        self.cache = cache
+        self.profiler = profiler
+        self.logger = logger
+
+        self.loader = DatasetLoader()
+        self.splitter = DataSplitter(
+            random_state=config.get("splitting.random_state"),
+            mode=config.get("splitting.mode", "random"),
+            key_fields=config.get("splitting.key_fields", [])
+        )
+        self.merge_cfg = config.get("merging", {})
+        self.merger = DatasetMerger(
+            random_state=config.get("splitting.random_state", 42),
+            window_size=self.merge_cfg.get("shuffle_window", 100_000),
+            spill_dir=self._output_path(self.merge_cfg.get("spill_dir"))
+        )
+        self.split_cfg = {
+            key: config.get(f"splitting.{key}")
+            for key in ("test_size", "val_ratio_of_test", "random_state", "mode", "key_fields")
+        }
+
+        clean_cfg = config.get("cleaning", {})
+        num_proc = clean_cfg.get("num_proc", 1)
+        self.clean_map_kwargs = {
+            "batched": True,
+            "batch_size": clean_cfg.get("batch_size", 1000),
+            "num_proc": num_proc if num_proc > 1 else None,
+        }
+
+        self.leak_cfg = config.get("leakage", {})
+        self.leakage_checker = LeakageChecker(
+            action=self.leak_cfg.get("action", "remove"),
+            ngram_size=self.leak_cfg.get("ngram_size", 13),
+            ngram_threshold=self.leak_cfg.get("ngram_threshold"),
+            logger=logger
+        )
+        self.leakage_version = code_version(LeakageChecker)
+        self.save_version = code_version(DatasetLoader)
+        self.prefixes = config.get("output.file_prefixes", {})
+        self.formats = config.get("output.formats", {})
+        self.tokenized_cfg = config.get("output.tokenized", {})
+
+    def __call__(self, stage: Dict, inputs: List[Any]) -> Any:
+        task = stage.get("task")
+        if task not in self.TASKS:
+            raise ValueError(f"Stage '{stage['name']}': unknown task '{task}', expected one of {self.TASKS}")
+        return getattr(self, task)(stage, inputs)
+
+    # === In-memory dialogue tasks ===
+
+    def load(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Load the Hugging Face dataset of `datasets.<stage.dataset>`."""
+        dataset_cfg = self.config.get(f"datasets.{stage['dataset']}")
+        self._log(f"Loading {dataset_cfg['name']}")
+        with self.profiler.stage(stage["name"]) as stats:
+            dataset = self.loader.load_huggingface_dataset(dataset_cfg["name"])
+            stats.records_out = sum(dataset[subset].num_rows for subset in dataset_cfg["subsets"])
+        return {"dataset": dataset, "config": dataset_cfg}
+
+    def clean_format(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Scan, clean, re-scan and format every subset of a loaded dialogue dataset."""
+        from .auditing_cleaner import AuditingCleaner
+        from .formatters.dialogue_formatter import DialogueFormatter
+
+        dataset, dataset_cfg = inputs[0]["dataset"], inputs[0]["config"]
+        formatter = DialogueFormatter(logger=self.logger)
+        auditor = AuditingCleaner(
+            dataset_cfg["text_key"],
+            dataset_cfg["is_list"],
+            id_key=dataset_cfg["id_key"],
+            verbose=self.config.get("scanning.verbose", False),
+            logger=self.logger
+        )
+        version = code_version(AuditingCleaner, DialogueFormatter)
+        source = stage["name"].rsplit(".", 1)[0]
+        subsets = dataset_cfg["subsets"]
+
+        def clean_and_format(subset):
+            label = source if len(subsets) == 1 else f"{source}.{subset}"
+            self._log(f"[SCAN] Scanning and cleaning {dataset_cfg['name']} '{subset}'...")
+            rows = dataset[subset].num_rows
+            with self.profiler.stage(f"{label}.scan_clean", records_in=rows) as stats:
+                dataset[subset], issues_before, issues_after = auditor.apply(dataset[subset], **self.clean_map_kwargs)
+                stats.records_out = dataset[subset].num_rows
+            self._log(f"[SCAN] Issues before cleaning ({subset}): {issues_before}")
+            self._log(f"[SCAN] Issues after cleaning ({subset}): {issues_after}")
+            with self.profiler.stage(f"{label}.format", records_in=rows) as stats:
+                formatted = formatter.format_records(dataset_cfg, dataset, subset)
+                stats.records_out = len(formatted)
+            return formatted
+
+        keys, splits = {}, {}
+        for subset in subsets:
+            keys[subset] = self.cache.key(stage["name"], dataset[subset]._fingerprint, dataset_cfg, version)
+            splits[subset] = self.cache.run(stage["name"], keys[subset], lambda: clean_and_format(subset))
+        return {"key": keys, "splits": splits}
+
+    def split(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Split the records of every input subset into train/validation/test (`splitting` config)."""
+        source = inputs[0]
+        data = list(itertools.chain.from_iterable(source["splits"].values()))
+        key = self.cache.key(stage["name"], source["key"], self.split_cfg, code_version(DataSplitter))
+        with self.profiler.stage(stage["name"], records_in=len(data)) as stats:
+            train, val, test = self.cache.run(stage["name"], key, lambda: self.splitter.split(
+                data,
+                test_size=self.split_cfg["test_size"],
+                val_ratio_of_test=self.split_cfg["val_ratio_of_test"]
+            ))
+            stats.records_out = len(train) + len(val) + len(test)
+        return {"key": key, "splits": dict(zip(SPLITS, (train, val, test)))}
+
+    def merge(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Merge the inputs split by split (in `after` order) and shuffle each split."""
+        self._log("Merging datasets")
+        key = self.cache.key(
+            stage["name"],
+            [source["key"] for source in inputs],
+            self.merge_cfg,
+            self.split_cfg["random_state"],
+            code_version(DatasetMerger)
+        )
+        by_split = [[source["splits"].get(split, []) for source in inputs] for split in SPLITS]
+        with self.profiler.stage(stage["name"], records_in=sum(map(len, itertools.chain(*by_split)))) as stats:
+            merged = self.cache.run(stage["name"], key, lambda: self.merger.merge_and_shuffle(*by_split))
+            stats.records_out = sum(map(len, merged))
+        return {"key": key, "splits": dict(zip(SPLITS, merged))}
+
+    def leakage(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Drop/report validation and test rows overlapping train (`leakage` config)."""
+        source = inputs[0]
+        if not self.leak_cfg.get("enabled", True):
+            return source
+        key = self.cache.key(stage["name"], source["key"], self.leak_cfg, self.leakage_version)
+        train, val, test = (source["splits"].get(split, []) for split in SPLITS)
+        with self.profiler.stage(stage["name"], records_in=len(train) + len(val) + len(test)) as stats:
+            train, val, test, _ = self.cache.run(
+                stage["name"], key, lambda: self.leakage_checker.check(train, val, test)
+            )
+            stats.records_out = len(train) + len(val) + len(test)
+        return {"key": key, "splits": dict(zip(SPLITS, (train, val, test)))}
+
+    def save(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """
+        Write each split to `<output.file_prefixes[output]>_<split>` in
+        `output.formats[output]`; `skip_empty: true` skips empty splits.
+        """
+        source = inputs[0]
+        output = stage["output"]
+        prefix = self.prefixes.get(output, output)
+        fmt = self.formats.get(output, "json")
+        paths = {}
+        total = sum(len(data) for data in source["splits"].values())
+        with self.profiler.stage(stage["name"], records_in=total) as stats:
+            for split, data in source["splits"].items():
+                if not data and stage.get("skip_empty", False):
+                    continue
+                stem = os.path.join(self.output_dir, f"{prefix}_{split}")
+                key = self.cache.key("save", self._split_key(source, split), fmt, self.save_version)
+                paths[split] = self.cache.write(stem, key, lambda: self.loader.save_records(data, stem, fmt))
+                stats.wrote(paths[split])
+                self._log(f"Saved {output} {split}: {len(data)} records → {paths[split]}")
+        return {"paths": paths}
+
+    def model_format(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Write the model-input text of each split to `<output prefix>_<split>.txt`."""
+        from .model_formatters.dialogue_model_formatter import DialogueModelFormatter
+
+        source = inputs[0]
+        model_formatter = DialogueModelFormatter(logger=self.logger)
+        prefix = self.prefixes[stage["output"]]
+        key = self.cache.key(
+            stage["name"], source["key"], code_version(DialogueModelFormatter), self.save_version
+        )
+
+        def format_and_save(data, path):
+            self.loader.save_text_chunks(model_formatter.iter_format_for_model(data), path)
+            return path
+
+        self._log("Formatting for model input")
+        paths = {}
+        total = sum(len(data) for data in source["splits"].values())
+        with self.profiler.stage(stage["name"], records_in=total) as stats:
+            for split, data in source["splits"].items():
+                path = os.path.join(self.output_dir, f"{prefix}_{split}.txt")
+                paths[split] = self.cache.write(path, key, lambda: format_and_save(data, path))
+                stats.wrote(path)
+                self._log(f"Saved formatted {split} → {path}")
+        return {"paths": paths}
+
+    def tokenize(self, stage: Dict, inputs: List[Any]) -> Optional[Dict]:
+        """Pre-tokenized shards of each split's model text (`output.tokenized`); None when disabled."""
+        if not self.tokenized_cfg.get("enabled", False):
+            return None
+        from .model_formatters.dialogue_model_formatter import DialogueModelFormatter
+        from .token_shards import TokenShardWriter, load_tokenizer
+
+        source = inputs[0]
+        model_formatter = DialogueModelFormatter(logger=self.logger)
+        tokenizer = load_tokenizer(self.tokenized_cfg.get("tokenizer", "bytes"))
+        shard_tokens = self.tokenized_cfg.get("shard_tokens", 100_000_000)
+        prefix = self.prefixes[stage["output"]]
+        key = self.cache.key(
+            stage["name"], source["key"], self.tokenized_cfg, code_version(DialogueModelFormatter, TokenShardWriter)
+        )
+        manifests = {}
+        total = sum(len(data) for data in source["splits"].values())
+        with self.profiler.stage(stage["name"], records_in=total) as stats:
+            for split, data in source["splits"].items():
+                writer = TokenShardWriter(
+                    os.path.join(self.output_dir, f"{prefix}_{split}_tokens"), tokenizer, shard_tokens, self.logger
+                )
+                manifests[split] = self.cache.write(
+                    writer.manifest_path, key, lambda: writer.write_all(model_formatter.iter_documents(data))
+                )
+                stats.wrote(writer.manifest_path, *(
+                    os.path.join(self.output_dir, shard["bin"]) for shard in writer.shards
+                ))
+        return {"paths": manifests}
+
+    # === Instruction tasks ===
+
+    def instruction_ingest(self, stage: Dict, inputs: List[Any]) -> Optional[Dict]:
+        """
+        Load, clean, format, dedup and split every local instruction source
+        (`datasets.instruction-sets.sources`); None when none are configured.
+        """
+        instruction_sources = self.config.get("datasets.instruction-sets.sources", [])
+        if not instruction_sources:
+            self._log("No instruction datasets configured.")
+            return None
+
+        from .deduplicator import Deduplicator
+        from .difficulty_merger import DifficultyMerger
+        from .formatters.instruction_formatter import InstructionFormatter
+        from .instruction_ingestor import InstructionIngestor
+        from .text_cleaner import TextCleaner
+
+        dedup_cfg = self.config.get("deduplication", {})
+        deduplicator = Deduplicator(
+            logger=self.logger,
+            memory_budget_mb=dedup_cfg.get("memory_budget_mb"),
+            spill_dir=self._output_path(dedup_cfg.get("spill_dir"))
+        )
+        instruction_splits = {"train": [], "validation": [], "test": []}
+        instruction_version = code_version(
+            InstructionIngestor, TextCleaner, InstructionFormatter, Deduplicator, DifficultyMerger, DatasetLoader
+        )
+        instruction_split_cfg = {
+            "test_size": self.config.get("splitting.instruction_test_size", 0.1),
+            "val_ratio_of_test": self.config.get("splitting.val_ratio_of_test", 0.48),
+            "random_state": self.config.get("splitting.random_state"),
+            "mode": self.splitter.mode,
+            "key_fields": self.splitter.key_fields,
+        }
+        instruction_keys = []
+        near_dedup_cfg = dedup_cfg.get("near_duplicates", {})
+        # "global" also drops records already seen in an earlier source
+        global_keys = deduplicator.new_key_store() if dedup_cfg.get("scope") == "global" else None
+
+        near_dedup_seed = self.config.get("splitting.random_state", 42)
+        ingestor = InstructionIngestor(
+            self.loader,
+            TextCleaner(logger=self.logger),
+            InstructionFormatter(logger=self.logger),
+            deduplicator,
+            DifficultyMerger(logger=self.logger),
+            near_dedup_cfg=near_dedup_cfg,
+            seed=near_dedup_seed,
+            logger=self.logger
+        )
+        source_keys = [
+            self._ingest_key(source, near_dedup_cfg, near_dedup_seed, instruction_version)
+            for source in instruction_sources
+        ]
+
+        # Sources are ingested in parallel (pipeline.ingest_workers, default pipeline.workers)
+        # but consumed in config order
+        ingest_calls = ingestor.run_all(
+            instruction_sources,
+            workers=self.config.get("pipeline.ingest_workers", 0) or self.config.get("pipeline.workers", 1),
+            cached=lambda idx: self.cache.contains("instruction.clean_format_dedup", source_keys[idx])
+        )
+        for source, source_key, ingest in zip(instruction_sources, source_keys, ingest_calls):
+            source_name = os.path.basename(source["path"])
+            cached = self.cache.contains("instruction.clean_format_dedup", source_key)
+            # With ingest_workers > 1 this stage's wall time is the wait for the worker
+            with self.profiler.stage(f"instruction.ingest:{source_name}") as stats:
+                deduped, ingest_stats = self.cache.run("instruction.clean_format_dedup", source_key, ingest)
+                stats.records_in, stats.records_out = ingest_stats["loaded"], ingest_stats["kept"]
+            timing = "cached" if cached else f"{ingest_stats['seconds']}s wall / {ingest_stats['cpu_seconds']}s CPU"
+            self._log(
+                f"[INGEST] {ingest_stats['path']}: {ingest_stats['loaded']} loaded → "
+                f"{ingest_stats['kept']} kept ({timing})"
+            )
+            if deduped is None:
+                continue
+            if global_keys is not None:
+                with self.profiler.stage(f"instruction.dedup:{source_name}", records_in=len(deduped)) as stats:
+                    deduped = deduplicator.remove_duplicates(
+                        deduped, ["instruction", "output"], seen=global_keys
+                    )
+                    stats.records_out = len(deduped)
+
+            # Split
+            split_key = self.cache.key(
+                "instruction.split",
+                source_key,
+                instruction_keys if global_keys is not None else [],
+                instruction_split_cfg,
+                code_version(DataSplitter)
+            )
+            with self.profiler.stage(f"instruction.split:{source_name}", records_in=len(deduped)) as stats:
+                train, val, test = self.cache.run("instruction.split", split_key, lambda: self.splitter.split(
+                    deduped,
+                    test_size=instruction_split_cfg["test_size"],
+                    val_ratio_of_test=instruction_split_cfg["val_ratio_of_test"],
+                ))
+                stats.records_out = len(train) + len(val) + len(test)
+            instruction_keys.append(split_key)
+
+            instruction_splits["train"].extend(train)
+            instruction_splits["validation"].extend(val)
+            instruction_splits["test"].extend(test)
+
+        if global_keys is not None:
+            global_keys.close()
+        return {"key": instruction_keys, "splits": instruction_splits}
+
+    def merge_instruction(self, stage: Dict, inputs: List[Any]) -> Optional[Dict]:
+        """Lazily append the instruction splits to the dialogue splits (`merging.include_instruction`)."""
+        if not self.config.get("merging.include_instruction", True):
+            return None
+        self._log("Merging instruction data with dialogue data...")
+        return {
+            "key": [source["key"] for source in inputs],
+            "splits": {
+                split: self.merger.chain_lists([source["splits"].get(split, []) for source in inputs])
+                for split in SPLITS
+            },
+        }
+
+    # === Streaming dialogue tasks ===
+
+    def stream(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Stream `datasets.<stage.dataset>` end to end to `<output prefix>_<split>` files."""
+        dataset_cfg = self.config.get(f"datasets.{stage['dataset']}")
+        output = stage["output"]
+        with self.profiler.stage(stage["name"]) as stats:
+            paths = self._streamer().run(dataset_cfg, self.prefixes[output], self.formats.get(output, "jsonl"))
+            stats.wrote(*paths.values())
+        return {"paths": paths}
+
+    def stream_merge(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Concatenate and shuffle the streamed inputs' split files."""
+        self._log("Merging datasets")
+        output = stage["output"]
+        with self.profiler.stage(stage["name"]) as stats:
+            paths = self._streamer().merge(
+                [source["paths"] for source in inputs], self.prefixes[output], self.formats.get(output, "jsonl")
+            )
+            stats.wrote(*paths.values())
+        return {"paths": paths}
+
+    def stream_model_format(self, stage: Dict, inputs: List[Any]) -> Dict:
+        """Model-input text of each streamed split file."""
+        self._log("Formatting for model input")
+        prefix = self.prefixes[stage["output"]]
+        merged = inputs[0]["paths"]
+        paths = {split: os.path.join(self.output_dir, f"{prefix}_{split}.txt") for split in merged}
+        with self.profiler.stage(stage["name"]) as stats:
+            self._streamer().format_for_model(merged, prefix)
+            stats.wrote(*paths.values())
+        return {"paths": paths}
+
+    def stream_tokenize(self, stage: Dict, inputs: List[Any]) -> Optional[Dict]:
+        """Pre-tokenized shards of each streamed split file; None when `output.tokenized` is disabled."""
+        if not self.tokenized_cfg.get("enabled", False):
+            return None
+        from .token_shards import load_tokenizer
+
+        tokenizer = load_tokenizer(self.tokenized_cfg.get("tokenizer", "bytes"))
+        with self.profiler.stage(stage["name"]) as stats:
+            manifests = self._streamer().tokenize(
+                inputs[0]["paths"],
+                self.prefixes[stage["output"]],
+                tokenizer,
+                self.tokenized_cfg.get("shard_tokens", 100_000_000)
+            )
+            stats.wrote(*manifests.values())
+        return {"paths": manifests}
+
+    def _streamer(self):
+        from .formatters.dialogue_formatter import DialogueFormatter
+        from .model_formatters.dialogue_model_formatter import DialogueModelFormatter
+        from .streaming_pipeline import StreamingDialoguePipeline
+
+        return StreamingDialoguePipeline(
+            self.loader,
+            DialogueFormatter(logger=self.logger),
+            self.splitter,
+            DialogueModelFormatter(logger=self.logger),
+            self.output_dir,
+            test_size=self.config.get("splitting.test_size"),
+            val_ratio_of_test=self.config.get("splitting.val_ratio_of_test"),
+            merger=self.merger,
+            batch_size=self.clean_map_kwargs["batch_size"],
+            verbose=self.config.get("scanning.verbose", False),
+            logger=self.logger
+        )
+
+    @staticmethod
+    def _split_key(source: Dict, split: str) -> Any:
+        key = source["key"]
+        return key[split] if isinstance(key, dict) else key
+
+    def _ingest_key(self, source: Dict, near_dedup_cfg: Dict, seed: int, version: str) -> str:
+        """
+        Cache key of one source's clean/format/dedup result: the source entry,
+        its files' content, the near-dedup settings (with the MinHash seed
+        when near-dedup is enabled) and the code version.
+        """
+        input_digests = [file_digest(source["path"])]
+        if source.get("difficulty_file"):
+            input_digests.append(file_digest(source["difficulty_file"]))
+        if near_dedup_cfg.get("enabled", False):
+            near_dedup_cfg = {**near_dedup_cfg, "seed": seed}
+        return self.cache.key("instruction.clean_format_dedup", source, input_digests, near_dedup_cfg, version)
+
+    def _output_path(self, path: str) -> str:
+        """Config paths such as spill dirs are relative to `output.base_dir` unless absolute."""
+        return os.path.join(self.output_dir, path) if path else None
+
+    def _log(self, message: str, level: int = logging.INFO) -> None:
+        if self.logger:
+            self.logger.log(level, message)
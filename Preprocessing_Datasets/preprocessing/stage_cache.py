@@ -0,0 +1,218 @@
+# preprocessing/stage_cache.py
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def file_digest(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(*objects: Any) -> str:
+    """
+    Hash of the source of the modules defining `objects`, plus every module
+    of the same package they import (so TextCleaner covers CleaningEngine
+    and the patterns in constants.py).
+    """
+    seen = {}
+    pending = [inspect.getmodule(obj) for obj in objects]
+    while pending:
+        module = pending.pop()
+        if module is None or module.__name__ in seen:
+            continue
+        source = inspect.getsource(module)
+        seen[module.__name__] = source
+        pending.extend(_local_imports(module, source))
+
+    digest = hashlib.sha256()
+    for name in sorted(seen):
+        digest.update(name.encode("utf-8"))
+        digest.update(seen[name].encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _local_imports(module, source: str):
+    package = module.__name__.split(".")[0]
+    current = module.__package__ or module.__name__
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ImportFrom):
+            name = importlib.util.resolve_name("." * node.level + (node.module or ""), current)
+            names = [name] + [f"{name}.{alias.name}" for alias in node.names]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        for name in names:
+            if name.split(".")[0] == package and name in sys.modules:
+                yield sys.modules[name]
+
+
+class StageCache:
+    """
+    Content-addressed cache of pipeline stage results.
+
+    A stage key is a hash of the stage name and its parts: the keys or
+    fingerprints of its inputs, the config subtree it reads, and the
+    `code_version` of the classes it runs. Chaining upstream keys into
+    downstream ones means a change only invalidates the stages after it;
+    e.g. changing `splitting.test_size` re-splits but does not re-clean.
+
+    Results are pickled under `cache_dir`; written output files are tracked
+    in a manifest so unchanged outputs are not rewritten. With
+    `max_size_mb`, the least recently used pickles are evicted once their
+    total size goes over it.
+    """
+
+    MANIFEST = "manifest.json"
+    MANIFEST_LOCK = "manifest.lock"
+
+    def __init__(self, cache_dir: str, enabled: bool = True, max_size_mb: float = None, logger=None):
+        if max_size_mb is not None and max_size_mb <= 0:
+            raise ValueError("max_size_mb must be positive")
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.max_bytes = None if max_size_mb is None else int(max_size_mb * (1 << 20))
+        self.logger = logger
+        self._manifest_path = self.cache_dir / self.MANIFEST
+        self._manifest = {}
+        self._lock = threading.Lock()  # stages may write outputs from several threads (and processes, see write)
+        if enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._manifest_path.exists():
+                with open(self._manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def key(self, stage: str, *parts: Any) -> str:
+        payload = json.dumps([stage, *parts], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def contains(self, stage: str, key: str) -> bool:
+        """True if `run(stage, key, ...)` would reuse a stored result."""
+        return self.enabled and (self.cache_dir / stage / f"{key}.pkl").exists()
+
+    def run(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for (stage, key), computing and storing it on a miss."""
+        if not self.enabled:
+            return compute()
+
+        path = self.cache_dir / stage / f"{key}.pkl"
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:  # a miss, or evicted by a concurrent run
+            pass
+        else:
+            if self.logger:
+                self.logger.info(f"[CACHE] Reusing '{stage}' ({key[:12]})")
+            os.utime(path)  # mark as recently used for eviction
+            return result
+
+        result = compute()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per process and thread: concurrent stages may compute the same key
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        if self.max_bytes is not None:
+            self._evict(keep=path)
+        return result
+
+    def write(self, output: str, key: str, writer: Callable[[], str]) -> str:
+        """
+        Run `writer` (which returns the path it wrote) unless `output` was last
+        written under `key` and that file still exists. Returns the path.
+        """
+        entry = self._manifest.get(output)
+        if self.enabled and entry and entry["key"] == key and os.path.exists(entry["path"]):
+            if self.logger:
+                self.logger.info(f"[CACHE] Up to date: {entry['path']}")
+            return entry["path"]
+
+        path = writer()
+        if self.enabled:
+            with self._manifest_locked():
+                # Re-read first: worker processes (StageGraph "process" executor)
+                # each hold a copy and write their own entries
+                if self._manifest_path.exists():
+                    with open(self._manifest_path, encoding="utf-8") as f:
+                        self._manifest = json.load(f)
+                self._manifest[output] = {"key": key, "path": path}
+                tmp_path = self._manifest_path.with_name(f"{self.MANIFEST}.{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._manifest, f, indent=2)
+                os.replace(tmp_path, self._manifest_path)
+        return path
+
+    def _evict(self, keep: Path) -> None:
+        """Delete the least recently used pickles until they fit in `max_bytes`; `keep` is never deleted."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # evicted concurrently
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            if self.logger:
+                self.logger.info(f"[CACHE] Evicted {path.parent.name}/{path.name} ({size} bytes)")
+
+    @contextmanager
+    def _manifest_locked(self) -> Iterator[None]:
+        """
+        Exclusive access to the manifest: the thread lock for stages in this
+        process, plus an OS lock on `MANIFEST_LOCK` for stages in worker
+        processes, whose thread locks are their own.
+        """
+        with self._lock, open(self.cache_dir / self.MANIFEST_LOCK, "a+b") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
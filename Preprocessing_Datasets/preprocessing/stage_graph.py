@@ -0,0 +1,200 @@
+# preprocessing/stage_graph.py
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class StageGraph:
+    """
+    Runs named stages in dependency order; stages whose dependencies are
+    done run concurrently on a pool of `workers`, so the wall time is the
+    critical path rather than the sum of all branches.
+
+    A stage is `fn(inputs)`, where `inputs` are the results of its `after`
+    stages in the order given. A stage that returns None produced nothing
+    (e.g. a disabled output), and the stages after it are skipped, as are
+    the stages after one that was not selected.
+
+    Executors:
+      - "process": each stage runs in a worker process, so CPU-bound Python
+        stages (scanning, cleaning) really run in parallel. `fn`, its inputs
+        and its result must pickle; results travel back to this process.
+      - "thread": stages share this process and its GIL; no pickling, but
+        only I/O and work that releases the GIL overlap.
+    `executor` is the default; `add` can override it per stage (e.g. run
+    stages that only reshuffle records on a thread, next to their inputs).
+
+    Example (stage functions must pickle, so no lambdas with "process"):
+        def load(name, inputs):
+            ...
+        def merge(inputs):
+            ...
+        graph = StageGraph(workers=4, logger=logger)
+        graph.add("persona.load", functools.partial(load, "persona"))
+        graph.add("daily.load", functools.partial(load, "daily"))
+        graph.add("merge", merge, after=["persona.load", "daily.load"])
+        results = graph.run()
+    """
+
+    EXECUTORS = ("process", "thread")
+
+    def __init__(self, workers: int = 1, executor: str = "process", logger: logging.Logger = None):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"executor must be one of {self.EXECUTORS}")
+        self.workers = workers
+        self.executor = executor
+        self.logger = logger
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[List[Any]], Any],
+        after: Iterable[str] = (),
+        group: str = None,
+        executor: str = None
+    ) -> None:
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        executor = executor or self.executor
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Stage '{name}': executor must be one of {self.EXECUTORS}")
+        self._stages[name] = {"fn": fn, "after": list(after), "group": group, "executor": executor}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._stages)
+
+    def select(self, selection: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Stages matched by `selection`: a stage name, a name prefix ending at
+        a dot ("persona" selects "persona.load", "persona.split", ...) or a
+        stage group. None selects everything.
+        """
+        if selection is None:
+            return self.names
+        selection = list(selection)
+        unmatched = [s for s in selection if not any(self._matches(name, s) for name in self._stages)]
+        if unmatched:
+            groups = sorted({stage["group"] for stage in self._stages.values() if stage["group"]})
+            raise ValueError(f"Unknown stage(s) {unmatched}; stages: {self.names}, groups: {groups}")
+        return [name for name in self._stages if any(self._matches(name, s) for s in selection)]
+
+    def _matches(self, name: str, selector: str) -> bool:
+        return name == selector or name.startswith(f"{selector}.") or self._stages[name]["group"] == selector
+
+    def run(self, selection: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Run the selected stages (see `select`) and return stage name → result."""
+        order = self._topological_order()
+        selected = set(self.select(selection))
+        results: Dict[str, Any] = {}
+        finished = set()
+        started = set()
+        futures = {}
+        pools = {}
+
+        def pool_for(executor: str):
+            if executor not in pools:
+                if executor == "process":
+                    pools[executor] = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    pools[executor] = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage")
+            return pools[executor]
+
+        def schedule() -> None:
+            progress = True
+            while progress:
+                progress = False
+                for name in order:
+                    if name in started:
+                        continue
+                    stage = self._stages[name]
+                    if not all(dep in finished for dep in stage["after"]):
+                        continue
+                    started.add(name)
+                    progress = True
+                    reason = self._skip_reason(name, selected, results)
+                    if reason:
+                        if name in selected:
+                            self._log(f"[STAGE] Skipping {name} ({reason})")
+                        results[name] = None
+                        finished.add(name)
+                        continue
+                    inputs = [results[dep] for dep in stage["after"]]
+                    pool = pool_for(stage["executor"])
+                    futures[pool.submit(_run_stage, name, stage["fn"], inputs, self.logger)] = name
+
+        try:
+            schedule()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException:
+                        self._log(f"[STAGE] Cancelling pending stages after '{name}' failed", logging.ERROR)
+                        raise
+                    finished.add(name)
+                schedule()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+        return results
+
+    def _skip_reason(self, name: str, selected: set, results: Dict[str, Any]) -> Optional[str]:
+        if name not in selected:
+            return "not selected"
+        for dep in self._stages[name]["after"]:
+            if dep not in selected:
+                return f"'{dep}' not selected"
+            if results[dep] is None:
+                return f"'{dep}' did not run or produced nothing"
+        return None
+
+    def _topological_order(self) -> List[str]:
+        """Declaration order, with every stage after its dependencies; rejects unknown deps and cycles."""
+        for name, stage in self._stages.items():
+            unknown = [dep for dep in stage["after"] if dep not in self._stages]
+            if unknown:
+                raise ValueError(f"Stage '{name}' runs after unknown stage(s) {unknown}")
+
+        order, state = [], {}
+
+        def visit(name: str, path: List[str]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage dependency cycle: {' → '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self._stages[name]["after"]:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self._stages:
+            visit(name, [])
+        return order
+
+    def _log(self, message: str, level: int = logging.INFO) -> None:
+        if self.logger:
+            self.logger.log(level, message)
+
+
+def _run_stage(name: str, fn: Callable[[List[Any]], Any], inputs: List[Any], logger: logging.Logger = None) -> Any:
+    """Body of one stage; module-level so process pools can pickle it."""
+    if logger:
+        logger.info(f"[STAGE] Starting {name}")
+    start = time.perf_counter()
+    try:
+        result = fn(inputs)
+    except Exception:
+        if logger:
+            logger.error(f"[STAGE] {name} failed after {time.perf_counter() - start:.2f}s")
+        raise
+    if logger:
+        logger.info(f"[STAGE] Finished {name} in {time.perf_counter() - start:.2f}s")
+    return result
@@ -0,0 +1,255 @@
+# preprocessing/stage_profiler.py
+import cProfile
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Peak resident set size so far of this process (or its reaped children), in MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def _pid_alive(pid: int) -> Optional[bool]:
+    """Whether process `pid` exists; None where that can't be checked (on Windows os.kill(pid, 0) signals it)."""
+    if os.name != "posix":
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by another user
+        return True
+    return True
+
+
+class StageStats:
+    """Counters a stage fills in while it runs (see `StageProfiler.stage`)."""
+
+    def __init__(self, name: str, records_in: int = None):
+        self.name = name
+        self.records_in = records_in
+        self.records_out = None
+        self.bytes_written = 0
+        self._started = time.time()
+
+    def wrote(self, *paths: str) -> None:
+        """
+        Count the size of output files written by this stage; files left
+        untouched (e.g. up to date in the stage cache) are skipped.
+        """
+        for path in paths:
+            if path and os.path.isfile(path) and os.path.getmtime(path) >= self._started:
+                self.bytes_written += os.path.getsize(path)
+
+
+class StageProfiler:
+    """
+    Per-stage wall/CPU time, record counts, throughput, peak RSS and bytes
+    written, collected into a JSON report.
+
+    CPU time includes worker processes once they have exited (datasets.map
+    with num_proc, the ingestion pool). It is process-wide, so stages that
+    run concurrently on threads (see `StageGraph`) count each other's CPU
+    time; stages in worker processes are measured there and collected into
+    the report. Peak RSS is the process high-water mark when the stage
+    ends, so a stage that raises it is the one whose `peak_rss_mb` jumps.
+    With `profiler` set to "cprofile" or "pyinstrument" every outermost
+    stage of a thread is also profiled into `<profile_dir>/<stage>.prof`
+    (.html for pyinstrument); nested stages are part of their parent's dump.
+
+    Example:
+        with profiler.stage("persona.split", records_in=len(data)) as stats:
+            train, val, test = splitter.split(data)
+            stats.records_out = len(train) + len(val) + len(test)
+    """
+
+    PROFILERS = (None, "cprofile", "pyinstrument")
+    STALE_PART_SECONDS = 24 * 3600
+
+    def __init__(
+        self,
+        report_path: str,
+        enabled: bool = True,
+        profiler: str = None,
+        profile_dir: str = None,
+        logger=None
+    ):
+        if profiler not in self.PROFILERS:
+            raise ValueError(f"profiler must be one of {self.PROFILERS}")
+        self.report_path = report_path
+        self.enabled = enabled
+        self.profiler = profiler if enabled else None
+        self.profile_dir = profile_dir or os.path.join(os.path.dirname(report_path), "profiles")
+        self.logger = logger
+        self.stages: List[Dict[str, Any]] = []
+        self._local = threading.local()  # per-thread stage nesting depth
+        self._pid = os.getpid()
+        self._started = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        # Worker processes spool to `<report>.<run id>.<pid>.part`; the run id
+        # ends with the main process's pid (see `_remove_stale_parts`)
+        self._run_id = f"{self._started:%Y%m%dT%H%M%S%f}-{self._pid}"
+        if enabled:
+            self._remove_stale_parts()
+
+    def __getstate__(self):
+        # Sent to a worker process (StageGraph "process" executor): stages it
+        # records are spooled to a file that `write_report` collects
+        state = self.__dict__.copy()
+        state["_local"] = None
+        state["stages"] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name: str, records_in: int = None) -> Iterator[StageStats]:
+        stats = StageStats(name, records_in)
+        if not self.enabled:
+            yield stats
+            return
+
+        depth = getattr(self._local, "depth", 0)
+        profile = self._start_profile() if depth == 0 else None
+        self._local.depth = depth + 1
+        wall, cpu = time.perf_counter(), self._cpu_seconds()
+        start_offset = (datetime.now(timezone.utc) - self._started).total_seconds()
+        status = "failed"
+        try:
+            yield stats
+            status = "ok"
+        finally:
+            self._local.depth = depth
+            wall = time.perf_counter() - wall
+            cpu = self._cpu_seconds() - cpu
+            profile_path = self._stop_profile(profile, name)
+            records = stats.records_out if stats.records_out is not None else stats.records_in
+            entry = {
+                "stage": name,
+                "status": status,
+                "start_offset_seconds": round(start_offset, 4),
+                "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(cpu, 4),
+                "records_in": stats.records_in,
+                "records_out": stats.records_out,
+                "records_per_second": round(records / wall, 1) if records is not None and wall > 0 else None,
+                "peak_rss_mb": peak_rss_mb(),
+                "children_peak_rss_mb": peak_rss_mb(children=True),
+                "bytes_written": stats.bytes_written,
+            }
+            if profile_path:
+                entry["profile"] = profile_path
+            self._record(entry)
+            if self.logger:
+                self.logger.info(
+                    f"[PROFILE] {name}: {entry['wall_seconds']}s wall, {entry['cpu_seconds']}s CPU, "
+                    f"{entry['records_in']} → {entry['records_out']} records, peak RSS {entry['peak_rss_mb']} MB"
+                )
+
+    def write_report(self) -> Optional[str]:
+        """Write the JSON report (run metadata + one entry per stage) and return its path."""
+        if not self.enabled:
+            return None
+        for part in sorted(glob.glob(f"{glob.escape(self.report_path)}.{self._run_id}.*.part")):
+            with open(part, encoding="utf-8") as f:
+                self.stages.extend(json.loads(line) for line in f if line.strip())
+            os.remove(part)
+        self.stages.sort(key=lambda entry: entry["start_offset_seconds"])
+        report = {
+            "started": self._started.isoformat(),
+            "wall_seconds": round(time.perf_counter() - self._wall, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": peak_rss_mb(children=True),
+            "stages": self.stages,
+        }
+        Path(self.report_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        if self.logger:
+            self.logger.info(f"Stage profile → {self.report_path}")
+        return self.report_path
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        if os.getpid() == self._pid:
+            self.stages.append(entry)
+            return
+        Path(self.report_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.report_path}.{self._run_id}.{os.getpid()}.part", "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _remove_stale_parts(self) -> None:
+        """
+        Drop part files left by earlier runs that died before `write_report`.
+        A part is stale once its run's main process is gone; parts of runs
+        still going (e.g. a concurrent pipeline writing the same report) are
+        left alone. Where liveness can't be checked, parts older than
+        `STALE_PART_SECONDS` are dropped instead.
+        """
+        name = re.compile(re.escape(os.path.basename(self.report_path)) + r"\.\d+T\d+-(\d+)\.\d+\.part")
+        for part in glob.glob(f"{glob.escape(self.report_path)}.*.part"):
+            match = name.fullmatch(os.path.basename(part))
+            if not match:
+                continue
+            alive = _pid_alive(int(match.group(1)))
+            try:
+                if alive is False or (alive is None and time.time() - os.path.getmtime(part) > self.STALE_PART_SECONDS):
+                    os.remove(part)
+            except FileNotFoundError:  # removed by another run meanwhile
+                pass
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        t = os.times()
+        return t.user + t.system + t.children_user + t.children_system
+
+    def _start_profile(self):
+        if self.profiler == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            return profile
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError as e:
+                raise ImportError("profiling.profiler: pyinstrument requires `pip install pyinstrument`") from e
+            profile = Profiler()
+            profile.start()
+            return profile
+        return None
+
+    def _stop_profile(self, profile, name: str) -> Optional[str]:
+        if profile is None:
+            return None
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stem = os.path.join(self.profile_dir, re.sub(r"[^\w.-]+", "_", name))
+        if self.profiler == "cprofile":
+            profile.disable()
+            path = f"{stem}.prof"
+            profile.dump_stats(path)
+        else:
+            profile.stop()
+            path = f"{stem}.html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profile.output_html())
+        return path
@@ -0,0 +1,141 @@
+# preprocessing/streaming_pipeline.py
+import itertools
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple
+from .auditing_cleaner import AuditingCleaner
+from .token_shards import TokenShardWriter
+
+SPLITS = ("train", "validation", "test")
+
+
+class StreamingDialoguePipeline:
+    """
+    Dialogue datasets end to end on IterableDatasets and generators.
+
+    load (streaming, projected to id/text columns) → scan + clean + re-scan
+    → format → split → write, one record at a time, so memory does not grow
+    with the dataset. Differences from the in-memory pipeline:
+      - PersonaChat is split with `DataSplitter.iter_split` (stable hash of
+        the record key) instead of a shuffled `train_test_split`
+      - merged outputs concatenate the per-source files, shuffled with
+        `merger.iter_shuffled` (bounded window) when a merger is given
+      - outputs are always JSONL (`json` is written as `jsonl`)
+    """
+
+    def __init__(
+        self,
+        loader,
+        formatter,
+        splitter,
+        model_formatter,
+        output_dir: str,
+        test_size: float,
+        val_ratio_of_test: float,
+        merger=None,
+        batch_size: int = 1000,
+        verbose: bool = False,
+        logger=None
+    ):
+        self.loader = loader
+        self.formatter = formatter
+        self.splitter = splitter
+        self.model_formatter = model_formatter
+        self.output_dir = output_dir
+        self.merger = merger
+        self.test_size = test_size
+        self.val_ratio_of_test = val_ratio_of_test
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.logger = logger
+
+    def run(self, dataset_config: Dict, prefix: str, fmt: str = "jsonl") -> Dict[str, str]:
+        """Stream one dialogue dataset to `<prefix>_<split>` files; returns split → path."""
+        fmt = self._stream_format(fmt)
+        if "persona-chat" in dataset_config["name"]:
+            dialogues = itertools.chain.from_iterable(
+                self._iter_subset(dataset_config, subset) for subset in dataset_config["subsets"]
+            )
+            assigned = self.splitter.iter_split(dialogues, self.test_size, self.val_ratio_of_test)
+            return self._write_splits(assigned, prefix, fmt)
+
+        paths = {}
+        for subset in dataset_config["subsets"]:
+            path = os.path.join(self.output_dir, f"{prefix}_{subset}.{fmt}")
+            count = self.loader.save_jsonl(self._iter_subset(dataset_config, subset), path)
+            self._log(f"Saved {subset}: {count} dialogues → {path}")
+            paths[subset] = path
+        return paths
+
+    def merge(self, sources: List[Dict[str, str]], prefix: str, fmt: str = "jsonl") -> Dict[str, str]:
+        """Concatenate (and shuffle, with a merger) per-source split files into `<prefix>_<split>` files."""
+        fmt = self._stream_format(fmt)
+        paths = {}
+        for split in SPLITS:
+            inputs = [source[split] for source in sources if split in source]
+            path = os.path.join(self.output_dir, f"{prefix}_{split}.{fmt}")
+            records = itertools.chain.from_iterable(self.loader.iter_jsonl(p) for p in inputs)
+            if self.merger is not None:
+                records = self.merger.iter_shuffled([records], split)
+            count = self.loader.save_jsonl(records, path)
+            self._log(f"Saved merged {split}: {count} dialogues → {path}")
+            paths[split] = path
+        return paths
+
+    def format_for_model(self, merged: Dict[str, str], prefix: str) -> None:
+        """Write model-ready text per split, formatting one conversation at a time."""
+        for split, source_path in merged.items():
+            path = os.path.join(self.output_dir, f"{prefix}_{split}.txt")
+            pieces = self.model_formatter.iter_format_for_model(self.loader.iter_jsonl(source_path))
+            self.loader.save_text_chunks(pieces, path)
+            self._log(f"Saved formatted {split} → {path}")
+
+    def tokenize(self, merged: Dict[str, str], prefix: str, tokenizer, shard_tokens: int) -> Dict[str, str]:
+        """Write `<prefix>_<split>_tokens` shards per split; returns split → manifest path."""
+        manifests = {}
+        for split, source_path in merged.items():
+            writer = TokenShardWriter(
+                os.path.join(self.output_dir, f"{prefix}_{split}_tokens"), tokenizer, shard_tokens, self.logger
+            )
+            documents = self.model_formatter.iter_documents(self.loader.iter_jsonl(source_path))
+            manifests[split] = writer.write_all(documents)
+        return manifests
+
+    def _iter_subset(self, dataset_config: Dict, subset: str) -> Iterator[Dict]:
+        text_key, id_key = dataset_config["text_key"], dataset_config["id_key"]
+        dataset = self.loader.load_huggingface_dataset(
+            dataset_config["name"], split=subset, streaming=True, columns=[id_key, text_key]
+        )
+        audit = AuditingCleaner(
+            text_key, dataset_config["is_list"], id_key=id_key, verbose=self.verbose, logger=self.logger
+        )
+        issues_before, issues_after = {}, {}
+        self._log(f"[SCAN] Streaming {dataset_config['name']} '{subset}' through scan/clean/format...")
+        cleaned = audit.iter_apply(dataset, issues_before, issues_after, batch_size=self.batch_size)
+        yield from self.formatter.iter_records(dataset_config, cleaned)
+        self._log(f"[SCAN] Issues before cleaning ({subset}): {issues_before}")
+        self._log(f"[SCAN] Issues after cleaning ({subset}): {issues_after}")
+
+    def _write_splits(self, assigned: Iterable[Tuple[str, Dict]], prefix: str, fmt: str) -> Dict[str, str]:
+        writers = {
+            split: self.loader.jsonl_writer(os.path.join(self.output_dir, f"{prefix}_{split}.{fmt}"))
+            for split in SPLITS
+        }
+        try:
+            for split, dialogue in assigned:
+                writers[split].write(dialogue)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        for split, writer in writers.items():
+            self._log(f"Saved {split}: {writer.count} dialogues → {writer.path}")
+        return {split: writer.path for split, writer in writers.items()}
+
+    def _stream_format(self, fmt: str) -> str:
+        if fmt == "json":
+            self._log("Streaming mode writes JSONL; using 'jsonl' instead of 'json'.")
+            return "jsonl"
+        return fmt
+
+    def _log(self, message: str) -> None:
+        if self.logger:
+            self.logger.info(message)
@@ -4,17 +4,22 @@ import unicodedata
 from typing import Dict
 import logging
 from .constants import CLEANING_PATTERNS
+from .cleaning_engine import CleaningEngine
+from .logger_factory import LogSampler
 
 class TextCleaner:
     def __init__(self, patterns: Dict[str, re.Pattern] = None, logger=None):
         self.patterns = patterns or CLEANING_PATTERNS
         self.logger = logger
+        self.sampler = LogSampler(logger)  # per-text warnings: a few samples, the rest counted (see log_summary)
+        self.engine = CleaningEngine(self.patterns)
 
     def clean_dialogue_text(self, text: list[str]) -> list[str]:
         return [self._apply_common_cleaning(t) for t in text]
-    
-    def clean_dialogue_text(self, text: list[str]) -> list[str]:
-        return [self._apply_common_cleaning(t) for t in text]
+
+    def log_summary(self) -> None:
+        """Log the counts of warnings and errors not logged individually; call after each batch."""
+        self.sampler.summarize()
 
     def clean_instruction_text(self, text: str) -> str:
         text = self._apply_common_cleaning(text)
@@ -30,49 +35,10 @@ class TextCleaner:
         if not isinstance(text, str):
             original = text
             text = str(text)
-            if self.logger:
-                self.logger.warning(f"Non-string input converted: {original}")
+            self.sampler.log("Non-string input", logging.WARNING, "Non-string input converted: %.80r", original)
 
         try:
-            # Remove structural noise
-            text = self.patterns["html_tags"].sub("", text)
-            text = self.patterns["urls"].sub("<URL>", text)
-            text = self.patterns["emails"].sub("<EMAIL>", text)
-
-            # Normalize quotes and contractions
-            text = text.translate(str.maketrans("‘’“”", "''\"\""))
-            text = re.sub(r"'\s+", "'", text)      # "don ' t" → "don' t"
-            text = re.sub(r"\s+'", "'", text)      # "don 't" → "don't"
-            text = re.sub(r"\\+'", "'", text)      # "don\\'t" → "don't"
-            text = text.replace('\\"', '"')        # escaped quotes
-            text = self.patterns["broken_contractions"].sub(r"\1'\2", text)  # "don ' t" → "don't"
-
-            # Replace any sequence of em/en dashes (with optional surrounding spaces)
-            # with a single hyphen that has exactly one space on each side
-            text = re.sub(r"\s*[–—]+\s*", " - ", text)
-            
-            # Normalize dashes and spacing
-            text = self.patterns["unicode_dashes"].sub("-", text)  # "–", "—" → "-"
-            #text = re.sub(r"\s+-\s+", " ", text)   # "word - word" → "word word"
-
-            # Only normalize hyphens that have whitespace on BOTH sides (or at least one side)
-            # This preserves hyphenated words like "well-made" and "mother-in-law"
-            dash_pattern = r"\s*-\s*"
-            text = re.sub(dash_pattern, " ", text)
-
-            text = re.sub(r"\s+", " ", text)       # collapse whitespace
-
-            # Define the regex pattern to match " - - "
-            double_dashes_with_spaces_pattern = r" - - "
-            # Use re.sub() to replace the pattern with an empty string (effectively removing it)
-            text = re.sub(double_dashes_with_spaces_pattern, "", text)
-
-            # Fix punctuation spacing
-            text = self.patterns["spaced_punctuation"].sub(r"\1", text)  # "word ." → "word."
-            text = text.replace(" ,", ",")         # "word ," → "word,"
-            return text.strip()
-
+            return self.engine.clean(text)
         except Exception as e:
-            if self.logger:
-                self.logger.error(f"Cleaning failed: {e} | Snippet: {text}")
+            self.sampler.log("Cleaning failure", logging.ERROR, "Cleaning failed: %s | Snippet: %.80s", e, text)
             return text
\ No newline at end of file
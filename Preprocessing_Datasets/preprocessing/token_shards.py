@@ -0,0 +1,190 @@
+# preprocessing/token_shards.py
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+import numpy as np
+
+
+class ByteTokenizer:
+    """
+    Local stand-in tokenizer: UTF-8 bytes are the token ids (0-255) and
+    256 marks the end of a document. Needs no vocabulary files.
+    """
+
+    name = "bytes"
+    vocab_size = 257
+    eos_id = 256
+
+    def encode(self, text: str) -> Sequence[int]:
+        return np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+
+
+class HuggingFaceTokenizer:
+    """Wraps a `transformers` tokenizer (optional dependency, imported on use)."""
+
+    def __init__(self, name: str):
+        try:
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(f"Tokenizer '{name}' requires `pip install transformers`") from e
+        self.name = name
+        self._tokenizer = AutoTokenizer.from_pretrained(name)
+        self.vocab_size = len(self._tokenizer)
+        self.eos_id = self._tokenizer.eos_token_id
+        if self.eos_id is None:
+            raise ValueError(f"Tokenizer '{name}' has no EOS token")
+
+    def encode(self, text: str) -> Sequence[int]:
+        return self._tokenizer.encode(text, add_special_tokens=False)
+
+
+def load_tokenizer(name: str = "bytes"):
+    """"bytes" gives the local ByteTokenizer; anything else is a Hugging Face tokenizer name."""
+    if name == "bytes":
+        return ByteTokenizer()
+    return HuggingFaceTokenizer(name)
+
+
+def token_dtype(vocab_size: int) -> np.dtype:
+    return np.dtype(np.uint16) if vocab_size <= 1 << 16 else np.dtype(np.uint32)
+
+
+class TokenShardWriter:
+    """
+    Writes documents as token ids into fixed-size binary shards.
+
+    For `<prefix>` it produces:
+      - `<prefix>_00000.bin`: flat little-endian uint16 (uint32 for
+        vocabularies over 65536) token ids; every document ends with `eos_id`
+      - `<prefix>_00000.idx`: uint64 offsets, one per document plus the end,
+        so document i is tokens[idx[i]:idx[i + 1]]
+      - `<prefix>.json`: manifest with dtype, tokenizer and per-shard file
+        names (relative to the manifest) and counts
+
+    A shard is closed once adding the next document would take it past
+    `shard_tokens`; documents are never split across shards. An empty
+    document is still written (as a lone `eos_id`), so document i is always
+    the i-th text passed to `write`. Tokens are
+    appended to the open shard as documents arrive, so only one document
+    (plus the shard's offsets) is in memory at a time.
+    """
+
+    def __init__(self, prefix: str, tokenizer=None, shard_tokens: int = 100_000_000, logger=None):
+        if shard_tokens < 1:
+            raise ValueError("shard_tokens must be at least 1")
+        self.prefix = prefix
+        self.tokenizer = tokenizer or ByteTokenizer()
+        self.shard_tokens = shard_tokens
+        self.dtype = token_dtype(self.tokenizer.vocab_size).newbyteorder("<")
+        self.logger = logger
+        self.shards: List[Dict] = []
+        self.documents = 0
+        self.tokens = 0
+        self._eos = np.array([self.tokenizer.eos_id], dtype=self.dtype).tobytes()
+        self._file = None
+        self._offsets = [0]
+        Path(prefix).parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def manifest_path(self) -> str:
+        return f"{self.prefix}.json"
+
+    def write(self, text: str) -> None:
+        ids = np.asarray(self.tokenizer.encode(text), dtype=self.dtype)
+        size = len(ids) + 1
+        if self._file is None or (self._offsets[-1] and self._offsets[-1] + size > self.shard_tokens):
+            self._next_shard()
+        self._file.write(ids.tobytes())
+        self._file.write(self._eos)
+        self._offsets.append(self._offsets[-1] + size)
+        self.documents += 1
+        self.tokens += size
+
+    def write_all(self, texts: Iterable[str]) -> str:
+        """Write every text, close, and return the manifest path."""
+        with self:
+            for text in texts:
+                self.write(text)
+        return self.manifest_path
+
+    def close(self) -> None:
+        self._close_shard()
+        manifest = {
+            "dtype": self.dtype.str,
+            "tokenizer": self.tokenizer.name,
+            "vocab_size": self.tokenizer.vocab_size,
+            "eos_id": self.tokenizer.eos_id,
+            "documents": self.documents,
+            "tokens": self.tokens,
+            "shards": self.shards,
+        }
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        if self.logger:
+            self.logger.info(
+                f"Wrote {self.tokens} tokens ({self.documents} documents) in "
+                f"{len(self.shards)} shard(s) → {self.manifest_path}"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_shard(self) -> None:
+        self._close_shard()
+        stem = f"{os.path.basename(self.prefix)}_{len(self.shards):05d}"
+        self.shards.append({"bin": f"{stem}.bin", "idx": f"{stem}.idx"})
+        self._file = open(self._shard_path("bin"), "wb")
+        self._offsets = [0]
+
+    def _close_shard(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        np.asarray(self._offsets, dtype="<u8").tofile(self._shard_path("idx"))
+        self.shards[-1].update(documents=len(self._offsets) - 1, tokens=self._offsets[-1])
+
+    def _shard_path(self, kind: str) -> str:
+        return os.path.join(os.path.dirname(self.prefix), self.shards[-1][kind])
+
+
+class TokenShards:
+    """
+    Read side of TokenShardWriter: memory-maps every shard, so documents
+    come back as zero-copy numpy views.
+
+    Example:
+        shards = TokenShards("output/formatted_merged_train_tokens.json")
+        tokens = shards.tokens(0)   # memmap of shard 0
+        doc = shards[123]           # token ids of document 123 (incl. EOS)
+    """
+
+    def __init__(self, manifest_path: str):
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        base = os.path.dirname(manifest_path)
+        dtype = np.dtype(self.manifest["dtype"])
+        shards = self.manifest["shards"]
+        self._tokens = [np.memmap(os.path.join(base, s["bin"]), dtype=dtype, mode="r") for s in shards]
+        self._offsets = [np.memmap(os.path.join(base, s["idx"]), dtype="<u8", mode="r") for s in shards]
+        self._starts = np.cumsum([0] + [s["documents"] for s in shards])
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += len(self)
+        if not (0 <= index < len(self)):
+            raise IndexError("document index out of range")
+        shard = int(np.searchsorted(self._starts, index, side="right")) - 1
+        local = index - self._starts[shard]
+        offsets = self._offsets[shard]
+        return self._tokens[shard][offsets[local]:offsets[local + 1]]
+
+    def tokens(self, shard: int) -> np.memmap:
+        return self._tokens[shard]
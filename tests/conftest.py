@@ -0,0 +1,18 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Preprocessing_Datasets")
+
+# The pipeline imports its package as `preprocessing`, relative to Preprocessing_Datasets/
+sys.path.insert(0, PACKAGE_DIR)
+
+
+@pytest.fixture
+def config():
+    """A fresh ConfigLoader for the shipped config (tests may edit its `_config`)."""
+    from preprocessing.config_loader import ConfigLoader
+
+    return ConfigLoader(os.path.join(PACKAGE_DIR, "config", "preprocessing_config.yaml"))
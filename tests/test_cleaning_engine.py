@@ -0,0 +1,93 @@
+# tests/test_cleaning_engine.py
+import itertools
+import random
+
+import pytest
+
+from benchmarks.bench_text_cleaner import legacy_common_cleaning
+from benchmarks.corpus import make_utterances
+from preprocessing.cleaning_engine import CleaningEngine
+from preprocessing.constants import CLEANING_PATTERNS
+
+ADVERSARIAL = [
+    "",
+    " ",
+    "\t\n  \r",
+    "plain text",
+    # HTML
+    "<b>bold</b> and <i>italic</i>",
+    "<a href='http://x.com'>link</a>",
+    "a < b > c",
+    "<<nested>> <br/> <p class=\"x\">p</p>",
+    "unclosed <div text",
+    # URLs and emails
+    "see http://example.com/path?q=1&r=2.",
+    "https://a.b/c,d and www.example.org",
+    "mail me: john.doe+tag@example.co.uk, ok?",
+    "user@host user@@host @handle",
+    "http://x.com/it's",
+    # Contractions and quotes
+    "don ' t can ' t won 't I 'm",
+    "it\\'s it\\\\'s \\\"quoted\\\"",
+    "‘single’ and “double” quotes",
+    "’ leading and trailing ‘",
+    "rock ’n’ roll",
+    "' '' ''' '",
+    # Dashes
+    "well—actually – no",
+    "a -- b --- c - d-e",
+    "— — —",
+    "‐‑‒–—―",
+    "- leading and trailing -",
+    " - - ",
+    "x - - y",
+    # Spaced punctuation
+    "hello , world . how are you ? fine !",
+    "wait ... what ; really :",
+    "a ,b , , c",
+    "( spaced ) [ brackets ]",
+    # Mixed / unicode
+    "émigré naïve café — ok",
+    "emoji 🙂 — ‘quote’ <b>x</b> http://e.com a@b.co",
+    "tabs\tand\nnewlines\r\n  everywhere",
+    " non-breaking space",
+    "zero​width",
+]
+
+FRAGMENTS = [
+    "<b>", "</b>", "http://ex.com/a", "www.x.org", "a@b.com", "don", " ' ", "t", "’", "‘", "“", "”",
+    "\\'", '\\"', "—", "–", "-", " - ", "--", " , ", " . ", " ? ", "!", "  ", "\t", "word", "I", "'m",
+]
+
+
+def fuzz_corpus(count, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return CleaningEngine(CLEANING_PATTERNS)
+
+
+@pytest.mark.parametrize("text", ADVERSARIAL)
+def test_adversarial_strings_match_legacy_chain(engine, text):
+    assert engine.clean(text) == legacy_common_cleaning(text)
+
+
+def test_fragment_combinations_match_legacy_chain(engine):
+    # Every ordered pair and triple of fragments: catches interactions between rules
+    for size in (2, 3):
+        for parts in itertools.product(FRAGMENTS, repeat=size):
+            text = "".join(parts)
+            assert engine.clean(text) == legacy_common_cleaning(text), repr(text)
+
+
+def test_fuzzed_strings_match_legacy_chain(engine):
+    for text in fuzz_corpus(5000):
+        assert engine.clean(text) == legacy_common_cleaning(text), repr(text)
+
+
+def test_synthetic_utterances_match_legacy_chain(engine):
+    for text in make_utterances(2000, seed=0):
+        assert engine.clean(text) == legacy_common_cleaning(text), repr(text)
@@ -0,0 +1,39 @@
+# tests/test_data_splitter.py
+import pytest
+
+from preprocessing.data_splitter import DataSplitter
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 10, 101, 1000])
+@pytest.mark.parametrize("test_size", [0.01, 0.1, 0.15, 0.48, 0.5, 0.9, 3, 0.999])
+@pytest.mark.parametrize("random_state", [0, 42, 1234])
+def test_train_test_split_matches_sklearn(n, test_size, random_state):
+    sklearn_split = pytest.importorskip("sklearn.model_selection").train_test_split
+    data = list(range(n))
+    if isinstance(test_size, int) and test_size >= n:
+        pytest.skip("sklearn requires a non-empty train set")
+    try:
+        expected_train, expected_test = sklearn_split(data, test_size=test_size, random_state=random_state)
+    except ValueError:
+        pytest.skip("sklearn rejects splits with an empty side")
+    train, test = DataSplitter.train_test_split(data, test_size, random_state)
+    assert (train, test) == (expected_train, expected_test)
+
+
+def test_train_test_split_int_test_size_is_a_row_count():
+    train, test = DataSplitter.train_test_split(list(range(100)), 5, random_state=0)
+    assert len(test) == 5
+    assert len(train) == 95
+
+
+@pytest.mark.parametrize("test_size", [-0.1, 1.5, -1, 101, "0.1", None])
+def test_train_test_split_rejects_invalid_test_size(test_size):
+    with pytest.raises(ValueError):
+        DataSplitter.train_test_split(list(range(100)), test_size, random_state=0)
+
+
+@pytest.mark.parametrize("val_ratio_of_test", [0, 1, 0.0, 1.0])
+def test_split_treats_integer_val_ratio_as_proportion(val_ratio_of_test):
+    train, val, test = DataSplitter(random_state=0).split(list(range(100)), 0.2, val_ratio_of_test)
+    assert len(train) == 80
+    assert (len(val), len(test)) == ((20, 0) if val_ratio_of_test == 0 else (0, 20))
@@ -0,0 +1,89 @@
+# tests/test_dataset_merger.py
+import os
+from collections import Counter
+
+import pytest
+
+from preprocessing.dataset_merger import DatasetMerger
+
+
+def sources(*sizes):
+    start, result = 0, []
+    for size in sizes:
+        result.append([{"id": i, "text": f"record {i}"} for i in range(start, start + size)])
+        start += size
+    return result
+
+
+def ids(records):
+    return [record["id"] for record in records]
+
+
+# window sizes: larger than the input (in memory), equal to it (one shard),
+# and smaller (several shards, including a short last one)
+@pytest.mark.parametrize("window_size", [1000, 250, 64, 7, 1])
+def test_shuffle_is_a_permutation(tmp_path, window_size):
+    parts = sources(100, 0, 150)
+    merger = DatasetMerger(random_state=3, window_size=window_size, spill_dir=str(tmp_path))
+    shuffled = list(merger.iter_shuffled(parts, "train"))
+    assert sorted(ids(shuffled)) == list(range(250))
+    assert shuffled != [record for part in parts for record in part]
+
+
+@pytest.mark.parametrize("window_size", [1000, 64])
+def test_shuffle_is_deterministic_for_a_seed(tmp_path, window_size):
+    parts = sources(120, 80)
+
+    def run(seed, split="train"):
+        merger = DatasetMerger(random_state=seed, window_size=window_size, spill_dir=str(tmp_path))
+        return ids(merger.iter_shuffled(parts, split))
+
+    assert run(42) == run(42)
+    assert run(42) != run(43)
+    assert run(42, "train") != run(42, "validation")
+
+
+def test_merge_and_shuffle_splits(tmp_path):
+    train, validation, test = sources(300, 40, 40)
+    for window_size in (1000, 32):
+        merger = DatasetMerger(random_state=1, window_size=window_size, spill_dir=str(tmp_path))
+        merged = merger.merge_and_shuffle([train[:150], train[150:]], [validation], [[], test])
+        for result, expected in zip(merged, (train, validation, test)):
+            assert sorted(ids(result)) == ids(expected)
+
+
+def test_spill_shards_live_in_spill_dir_and_are_removed(tmp_path):
+    spill_dir = tmp_path / "shuffle"
+    merger = DatasetMerger(random_state=0, window_size=10, spill_dir=str(spill_dir))
+    records = merger.iter_shuffled(sources(35), "train")
+    first = next(records)
+    (shard_dir,) = os.listdir(spill_dir)
+    assert sorted(os.listdir(spill_dir / shard_dir)) == ["0.pkl", "1.pkl", "2.pkl", "3.pkl"]
+    rest = list(records)
+    assert sorted(ids([first] + rest)) == list(range(35))
+    assert os.listdir(spill_dir) == []
+
+
+def test_input_smaller_than_the_window_does_not_touch_disk(tmp_path):
+    spill_dir = tmp_path / "shuffle"
+    merger = DatasetMerger(random_state=0, window_size=100, spill_dir=str(spill_dir))
+    assert sorted(ids(merger.iter_shuffled(sources(99), "train"))) == list(range(99))
+    assert not spill_dir.exists()
+
+
+def test_empty_input():
+    assert list(DatasetMerger(window_size=1).iter_shuffled([[], []])) == []
+
+
+def test_interleaving_does_not_favour_early_shards(tmp_path):
+    # Three shards of 4: the first output record should come from each about a third of the time
+    firsts = Counter()
+    for seed in range(600):
+        merger = DatasetMerger(random_state=seed, window_size=4, spill_dir=str(tmp_path))
+        firsts[next(iter(merger.iter_shuffled(sources(12))))["id"] // 4] += 1
+    assert all(150 < firsts[shard] < 250 for shard in range(3)), firsts
+
+
+def test_invalid_window_is_rejected():
+    with pytest.raises(ValueError):
+        DatasetMerger(window_size=0)
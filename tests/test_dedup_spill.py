@@ -0,0 +1,110 @@
+# tests/test_dedup_spill.py
+import json
+import os
+import random
+
+import pytest
+
+from preprocessing.deduplicator import Deduplicator
+from preprocessing.digest_store import DigestStore, record_digest
+from preprocessing.pipeline_tasks import PipelineTasks
+from preprocessing.stage_cache import StageCache
+from preprocessing.stage_profiler import StageProfiler
+
+FIELDS = ["instruction", "output"]
+TINY_BUDGET_MB = 0.001  # ~10 keys in memory before spilling
+
+
+def records_with_duplicates(count, distinct, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"instruction": f"q{n}", "output": f"a{n % 7}", "position": i}
+        for i, n in enumerate(rng.randrange(distinct) for _ in range(count))
+    ]
+
+
+def test_digest_store_spill_matches_a_set(tmp_path):
+    rng = random.Random(1)
+    digests = [rng.randrange(200).to_bytes(16, "little") for _ in range(2000)]
+    expected, added = set(), []
+    with DigestStore(max_in_memory=16, spill_dir=str(tmp_path)) as store:
+        for digest in digests:
+            added.append(store.add(digest))
+            assert store.spilled == 0 or os.listdir(tmp_path)
+        assert store.spilled > 0
+        assert len(store) == len(set(digests))
+    for digest, was_new in zip(digests, added):
+        assert was_new == (digest not in expected)
+        expected.add(digest)
+    # The spill database is removed on close
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("count,distinct", [(60, 25), (2000, 300), (2000, 2000)])
+def test_spilled_dedup_matches_in_memory(tmp_path, count, distinct):
+    records = records_with_duplicates(count, distinct)
+    in_memory = Deduplicator().remove_duplicates(records, FIELDS)
+
+    spilling = Deduplicator(memory_budget_mb=TINY_BUDGET_MB, spill_dir=str(tmp_path))
+    store = spilling.new_key_store()
+    assert store.max_in_memory < len(in_memory)
+    try:
+        assert spilling.remove_duplicates(records, FIELDS, seen=store) == in_memory
+        assert store.spilled > 0
+    finally:
+        store.close()
+
+
+def test_global_scope_keeps_the_earlier_source(tmp_path):
+    sources = [records_with_duplicates(500, 200, seed=s) for s in range(3)]
+    for origin, records in enumerate(sources):
+        for record in records:
+            record["origin"] = origin
+
+    dedup = Deduplicator(memory_budget_mb=TINY_BUDGET_MB, spill_dir=str(tmp_path))
+    store = dedup.new_key_store()
+    try:
+        kept = [dedup.remove_duplicates(records, FIELDS, seen=store) for records in sources]
+        assert store.spilled > 0
+    finally:
+        store.close()
+
+    first_origin = {}
+    for records in sources:
+        for record in records:
+            first_origin.setdefault(record_digest(record, FIELDS), record["origin"])
+    survivors = [record for records in kept for record in records]
+    assert len(survivors) == len(first_origin)
+    for record in survivors:
+        assert record["origin"] == first_origin[record_digest(record, FIELDS)]
+
+
+def run_instruction_ingest(config, tmp_path, budget_mb):
+    sources = []
+    for idx in range(3):
+        path = tmp_path / f"source{idx}.json"
+        records = [{"instruction": r["instruction"], "output": r["output"]}
+                   for r in records_with_duplicates(300, 120, seed=idx)]
+        path.write_text(json.dumps(records), encoding="utf-8")
+        sources.append({"path": str(path), "type": "basic"})
+
+    config._config["datasets"]["instruction-sets"]["sources"] = sources
+    config._config["deduplication"].update({
+        "scope": "global", "memory_budget_mb": budget_mb, "spill_dir": str(tmp_path / "dedup"),
+        "near_duplicates": {"enabled": False},
+    })
+    config._config["pipeline"]["ingest_workers"] = 1
+    tasks = PipelineTasks(
+        config, str(tmp_path), StageCache(str(tmp_path / "cache"), enabled=False),
+        StageProfiler(str(tmp_path / "profile.json"), enabled=False)
+    )
+    return tasks.instruction_ingest({"name": "instruction.ingest"}, [])["splits"]
+
+
+def test_instruction_ingest_spilling_matches_in_memory(config, tmp_path):
+    in_memory = run_instruction_ingest(config, tmp_path, None)
+    spilled = run_instruction_ingest(config, tmp_path, TINY_BUDGET_MB)
+    assert spilled == in_memory
+
+    keys = [record_digest(r, FIELDS) for split in spilled.values() for r in split]
+    assert len(keys) == len(set(keys))
@@ -0,0 +1,50 @@
+# tests/test_difficulty_merger.py
+import json
+
+from preprocessing.difficulty_merger import DifficultyMerger
+from preprocessing.pipeline_tasks import PipelineTasks
+from preprocessing.stage_cache import StageCache
+from preprocessing.stage_profiler import StageProfiler
+
+
+def write_json(path, value):
+    path.write_text(json.dumps(value), encoding="utf-8")
+    return str(path)
+
+
+def test_tag_prefixes_labels_in_order(tmp_path):
+    labels = write_json(tmp_path / "labels.json", ["easy", "hard"])
+    records = [{"instruction": "a", "output": "1"}, {"instruction": "b", "output": "2"}, {"instruction": "c", "output": "3"}]
+    tagged = list(DifficultyMerger().tag(records, labels))
+    assert [r["instruction"] for r in tagged] == ["<easy> a", "<hard> b", "<unknown> c"]
+
+
+def test_empty_instructions_take_a_label_but_are_not_tagged(tmp_path):
+    labels = write_json(tmp_path / "labels.json", ["easy", "medium", "hard"])
+    records = [{"instruction": "a", "output": "1"}, {"instruction": "", "output": "2"}, {"instruction": "c", "output": "3"}]
+    tagged = list(DifficultyMerger().tag(records, labels))
+    # The empty record keeps the labels of the records after it aligned
+    assert [r["instruction"] for r in tagged] == ["<easy> a", "", "<hard> c"]
+
+
+def test_ingest_drops_records_whose_instruction_cleans_to_nothing(config, tmp_path):
+    records = [
+        {"instruction": "Write a function", "output": "def f(): pass"},
+        {"instruction": "<br/>", "output": "orphaned output"},  # cleans to ""
+        {"instruction": "Fix the bug", "output": "return x"},
+    ]
+    source = {
+        "path": write_json(tmp_path / "source.json", records),
+        "type": "with_difficulty",
+        "difficulty_file": write_json(tmp_path / "labels.json", ["easy", "medium", "hard"]),
+    }
+    config._config["datasets"]["instruction-sets"]["sources"] = [source]
+    config._config["pipeline"]["ingest_workers"] = 1
+    tasks = PipelineTasks(
+        config, str(tmp_path), StageCache(str(tmp_path / "cache"), enabled=False),
+        StageProfiler(str(tmp_path / "profile.json"), enabled=False)
+    )
+    splits = tasks.instruction_ingest({"name": "instruction.ingest"}, [])["splits"]
+
+    kept = sorted((r["instruction"], r["output"]) for split in splits.values() for r in split)
+    assert kept == [("<easy> Write a function", "def f(): pass"), ("<hard> Fix the bug", "return x")]
@@ -0,0 +1,93 @@
+# tests/test_iter_json_records.py
+import gzip
+import json
+import random
+
+import pytest
+
+from preprocessing.data_loader import iter_json_records
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 16]
+
+DOCUMENTS = {
+    "empty array": "[]",
+    "empty array with whitespace": " \n\t[ \n ]\n ",
+    "numbers": "[1, -2.5, 3e10, 0, 1.5e-3, 12345678901234567890]",
+    "literals": "[true, false, null]",
+    "strings with delimiters": json.dumps(["a]b", "c,d", "[", "]", ",", "x\"]y", "q\\", "\\\"", "{}"]),
+    "escapes and unicode": json.dumps(["tab\tnew\nline", "é ü 🙂 —", "\u0000", "\\u0041"], ensure_ascii=True),
+    "raw unicode": json.dumps(["é ü 🙂 —", {"k": "ünïcödé"}], ensure_ascii=False),
+    "nested objects": json.dumps([
+        {"instruction": "i", "output": "o", "meta": {"tags": ["a", "b"], "deep": [[1, [2, {"x": []}]]]}},
+        {"instruction": "]", "output": "[", "n": None},
+    ]),
+    "whitespace everywhere": '\n[\n  {"a" : 1 } ,\n\n\t{ "b":[ 1 , 2 ] }\r\n ,"s"  ]  \n',
+    "indented": json.dumps([{"instruction": f"q{i}", "output": f"a{i}"} for i in range(20)], indent=2),
+    "numbers at chunk edges": "[" + ",".join(str(10 ** i) for i in range(25)) + "]",
+}
+
+
+def write(tmp_path, text, name="data.json"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("name", sorted(DOCUMENTS))
+def test_matches_json_load(tmp_path, name, chunk_size):
+    text = DOCUMENTS[name]
+    assert list(iter_json_records(write(tmp_path, text), chunk_size=chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", [5, 97, 4096])
+def test_large_records_across_chunk_boundaries(tmp_path, chunk_size):
+    rng = random.Random(0)
+    records = [
+        {"instruction": "x" * rng.randint(0, 3000) + "],\"", "output": [rng.random() for _ in range(rng.randint(0, 50))]}
+        for _ in range(50)
+    ]
+    text = json.dumps(records)
+    assert list(iter_json_records(write(tmp_path, text), chunk_size=chunk_size)) == records
+
+
+def test_is_lazy(tmp_path):
+    text = '[{"a": 1}, {"b": 2}, this is not json'
+    records = iter_json_records(write(tmp_path, text), chunk_size=4)
+    assert next(records) == {"a": 1}
+    assert next(records) == {"b": 2}
+    with pytest.raises(json.JSONDecodeError):
+        next(records)
+
+
+def test_jsonl(tmp_path):
+    records = [{"a": 1}, {"b": "]["}, {"c": [1, 2]}]
+    text = "\n".join(json.dumps(r) for r in records[:2]) + "\n\n" + json.dumps(records[2]) + "\n"
+    assert list(iter_json_records(write(tmp_path, text, "data.jsonl"), chunk_size=3)) == records
+
+
+def test_gzip(tmp_path):
+    records = [{"instruction": "q", "output": "a"}] * 3
+    path = tmp_path / "data.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(records, f)
+    assert list(iter_json_records(str(path), chunk_size=8)) == records
+
+
+def test_empty_file_yields_nothing(tmp_path):
+    assert list(iter_json_records(write(tmp_path, "  \n"))) == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+@pytest.mark.parametrize("text", [
+    "[1, 2",  # unterminated array
+    "[1 2]",  # missing comma
+    "[1,]",  # trailing comma
+    "[{\"a\": 1}",  # unterminated after an object
+    "[{\"a\": }]",  # bad value
+    "[\"unterminated]",  # unterminated string
+    "[1, 2,",  # ends after a comma
+])
+def test_malformed_input_raises_a_json_error(tmp_path, text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_records(write(tmp_path, text), chunk_size=chunk_size))
@@ -0,0 +1,110 @@
+# tests/test_leakage_checker.py
+import pytest
+
+from preprocessing.leakage_checker import LeakageChecker
+
+
+def instruction(text, output=""):
+    return {"instruction": text, "output": output}
+
+
+def dialogue(*turns):
+    return {"dialogue": [{"speaker": "A", "text": turn} for turn in turns]}
+
+
+TOKENS = [f"t{i}" for i in range(10)]  # 10 tokens → 8 trigrams
+
+
+def test_exact_matches_ignore_case_and_whitespace():
+    train = [instruction("What is  Python?", "A language."), dialogue("hi", "hello there")]
+    validation = [instruction("what is python?", "a   language."), instruction("something else")]
+    test = [dialogue("HI", "hello   there"), dialogue("hi", "goodbye")]
+
+    _, kept_validation, kept_test, report = LeakageChecker().check(train, validation, test)
+    assert kept_validation == [validation[1]]
+    assert kept_test == [test[1]]
+    assert report["validation"] == {"exact": 1, "total": 1, "rows": 2}
+    assert report["test"] == {"exact": 1, "total": 1, "rows": 2}
+
+
+def test_instruction_and_output_both_count():
+    train = [instruction("same question", "answer one")]
+    validation = [instruction("same question", "answer two")]
+    _, kept, _, report = LeakageChecker().check(train, validation, [])
+    assert kept == validation
+    assert report["validation"]["total"] == 0
+
+
+@pytest.mark.parametrize("threshold,leaks", [(0.5, True), (0.51, False), (0.25, True)])
+def test_ngram_threshold_boundary(threshold, leaks):
+    # train shares the first 6 tokens: trigrams 0..3, i.e. 4 of the row's 8
+    train = [instruction(" ".join(TOKENS[:6] + ["other", "words"]))]
+    validation = [instruction(" ".join(TOKENS))]
+    checker = LeakageChecker(ngram_size=3, ngram_threshold=threshold)
+    _, kept, _, report = checker.check(train, validation, [])
+    assert report["validation"]["exact"] == 0
+    assert report["validation"]["ngram"] == int(leaks)
+    assert kept == ([] if leaks else validation)
+
+
+def test_ngram_matches_are_counted_across_train_records():
+    train = [instruction(" ".join(TOKENS[:5])), instruction(" ".join(TOKENS[5:]))]
+    validation = [instruction(" ".join(TOKENS))]
+    # trigrams 0..2 and 5..7 occur in train; 3 and 4 straddle the two records
+    checker = LeakageChecker(ngram_size=3, ngram_threshold=0.75)
+    assert checker.check(train, validation, [])[3]["validation"]["ngram"] == 1
+    checker = LeakageChecker(ngram_size=3, ngram_threshold=0.76)
+    assert checker.check(train, validation, [])[3]["validation"]["ngram"] == 0
+
+
+def test_records_shorter_than_ngram_size_hash_the_whole_token_tuple():
+    checker = LeakageChecker(ngram_size=13, ngram_threshold=1.0)
+    assert checker._ngrams(instruction("a b c")) == {hash(("a", "b", "c"))}
+    assert checker._ngrams(instruction("!!")) == set()
+
+    # Punctuation defeats the exact check, the token tuple still matches
+    train = [instruction("A, b; c!"), instruction("x a b c y")]
+    validation = [instruction("a b c"), instruction("a b")]
+    _, kept, _, report = checker.check(train, validation, [])
+    assert report["validation"] == {"exact": 0, "ngram": 1, "total": 1, "rows": 2}
+    assert kept == [validation[1]]
+
+
+def test_short_row_does_not_match_inside_a_longer_train_record():
+    checker = LeakageChecker(ngram_size=13, ngram_threshold=0.5)
+    train = [instruction(" ".join(["a", "b", "c"] + TOKENS + ["d"]))]
+    validation = [instruction("a b c")]
+    assert checker.check(train, validation, [])[1] == validation
+
+
+def test_exact_leaks_are_not_counted_again_as_ngram_leaks():
+    train = [instruction(" ".join(TOKENS))]
+    validation = [instruction(" ".join(TOKENS).upper())]
+    checker = LeakageChecker(ngram_size=3, ngram_threshold=0.5)
+    report = checker.check(train, validation, [])[3]
+    assert report["validation"] == {"exact": 1, "ngram": 0, "total": 1, "rows": 1}
+
+
+@pytest.mark.parametrize("threshold", [None, 0.5])
+def test_report_leaves_the_splits_untouched(threshold):
+    train = [instruction(" ".join(TOKENS)), instruction("exact copy")]
+    validation = [instruction("exact copy"), instruction("clean row")]
+    test = [instruction(" ".join(TOKENS[:8])), instruction("another clean row")]
+
+    checker = LeakageChecker(action="report", ngram_size=3, ngram_threshold=threshold)
+    kept_train, kept_validation, kept_test, report = checker.check(train, validation, test)
+    assert (kept_train, kept_validation, kept_test) == (train, validation, test)
+    assert report["validation"]["total"] == 1
+    assert report["test"]["total"] == (1 if threshold else 0)
+
+    checker = LeakageChecker(action="remove", ngram_size=3, ngram_threshold=threshold)
+    kept_train, kept_validation, kept_test, _ = checker.check(train, validation, test)
+    assert kept_train == train
+    assert kept_validation == [validation[1]]
+    assert kept_test == (test[1:] if threshold else test)
+
+
+@pytest.mark.parametrize("kwargs", [{"action": "drop"}, {"ngram_threshold": 0}, {"ngram_threshold": 1.5}])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        LeakageChecker(**kwargs)
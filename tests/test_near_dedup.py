@@ -0,0 +1,123 @@
+# tests/test_near_dedup.py
+import json
+import random
+
+import numpy as np
+import pytest
+
+from preprocessing.deduplicator import Deduplicator
+from preprocessing.minhash import MinHashLSH, optimal_bands
+from preprocessing.pipeline_tasks import PipelineTasks
+from preprocessing.stage_cache import StageCache
+
+FIELDS = ["instruction", "output"]
+
+
+def words(count, seed):
+    rng = random.Random(seed)
+    return [f"w{rng.randrange(100_000)}" for _ in range(count)]
+
+
+def record(instruction_words, output="def f(): return 1"):
+    return {"instruction": " ".join(instruction_words), "output": output}
+
+
+def distinct_records(count, seed=0, length=60):
+    return [record(words(length, seed * 1000 + i)) for i in range(count)]
+
+
+def test_exact_and_formatting_duplicates_are_dropped():
+    base = words(40, 1)
+    records = [
+        record(base),
+        record([w.upper() for w in base]),  # case only
+        {"instruction": ",  ".join(base) + "!", "output": "def f():   return 1"},  # whitespace/punctuation only
+    ]
+    assert Deduplicator().remove_near_duplicates(records, FIELDS) == records[:1]
+
+
+def test_record_above_threshold_is_dropped():
+    base = words(100, 2)
+    edited = list(base)
+    edited[50] = "changed"  # 5 of ~100 shingles differ: Jaccard ~0.9
+    records = [record(base), record(edited)]
+    assert Deduplicator().remove_near_duplicates(records, FIELDS, threshold=0.8) == records[:1]
+
+
+def test_record_below_threshold_is_kept():
+    base = words(100, 3)
+    edited = base[:50] + words(50, 4)  # about half the shingles differ
+    records = [record(base), record(edited)]
+    assert Deduplicator().remove_near_duplicates(records, FIELDS, threshold=0.8) == records
+
+
+def test_distinct_records_survive():
+    records = distinct_records(300)
+    assert Deduplicator().remove_near_duplicates(records, FIELDS) == records
+
+
+def test_first_record_of_each_cluster_is_kept():
+    originals = distinct_records(50, seed=5, length=200)  # one edited word: Jaccard ~0.97
+    near = []
+    for item in originals:
+        tokens = item["instruction"].split()
+        tokens[-1] = "edited"
+        near.append(record(tokens))
+    records = [r for pair in zip(originals, near) for r in pair]
+    assert Deduplicator().remove_near_duplicates(records, FIELDS) == originals
+
+
+def test_records_without_tokens_are_kept():
+    records = [{"instruction": "", "output": "!!"}, {"instruction": "", "output": "??"}]
+    assert Deduplicator().remove_near_duplicates(records, FIELDS) == records
+
+
+def test_deterministic_for_a_seed():
+    rng = random.Random(7)
+    records = distinct_records(100, seed=7)
+    for _ in range(100):
+        tokens = rng.choice(records)["instruction"].split()
+        tokens[rng.randrange(len(tokens))] = "x"
+        records.append(record(tokens))
+    dedup = Deduplicator()
+    first = dedup.remove_near_duplicates(records, FIELDS, seed=1)
+    assert dedup.remove_near_duplicates(records, FIELDS, seed=1) == first
+    assert len(first) < len(records)
+
+
+def test_candidates_behind_the_first_bucket_member_are_checked():
+    lsh = MinHashLSH(num_perm=8, threshold=0.5)
+    rows = lsh.rows
+    first = np.zeros(8, np.uint32)
+    second = np.arange(100, 108, dtype=np.uint32)
+    second[:rows] = 0  # shares the first band bucket with `first`
+    third = second.copy()
+    third[-1] = 999  # matches `second`, not `first`
+    assert lsh.query_or_insert(first) is None
+    assert lsh.query_or_insert(second) is None
+    assert lsh.query_or_insert(third) == 1
+
+
+@pytest.mark.parametrize("num_perm,threshold", [(128, 0.8), (128, 0.5), (64, 0.9), (16, 0.7)])
+def test_optimal_bands_fit_the_signature(num_perm, threshold):
+    bands, rows = optimal_bands(num_perm, threshold)
+    assert bands * rows <= num_perm
+
+
+@pytest.mark.parametrize("kwargs", [{"threshold": 0}, {"threshold": 1.5}, {"num_perm": 1}, {"shingle_size": 0}])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        MinHashLSH(**kwargs)
+
+
+def test_ingest_cache_key_covers_the_minhash_seed(config, tmp_path):
+    source_path = tmp_path / "source.json"
+    source_path.write_text(json.dumps([record(words(10, 0))]), encoding="utf-8")
+    tasks = PipelineTasks(config, str(tmp_path), StageCache(str(tmp_path / "cache"), enabled=False), None)
+    source = {"path": str(source_path), "type": "basic"}
+
+    enabled = {"enabled": True, "threshold": 0.8, "shingle_size": 5, "num_perm": 128}
+    assert tasks._ingest_key(source, enabled, 1, "v") != tasks._ingest_key(source, enabled, 2, "v")
+    # The seed is unused (and not part of the key) when near-dedup is off
+    disabled = {**enabled, "enabled": False}
+    assert tasks._ingest_key(source, disabled, 1, "v") == tasks._ingest_key(source, disabled, 2, "v")
@@ -0,0 +1,39 @@
+# tests/test_pipeline_config.py
+import pytest
+
+import main
+from preprocessing.pipeline_tasks import PipelineTasks
+
+
+def test_shipped_stages_name_known_tasks(config):
+    for stage in config.get("pipeline.stages"):
+        assert stage["task"] in PipelineTasks.TASKS, stage["name"]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_shipped_stage_graph_is_valid(config, streaming, tmp_path):
+    config._config["pipeline"]["streaming"] = streaming
+    graph = main.build_graph(config, PipelineTasks(config, str(tmp_path), None, None))
+    graph._topological_order()  # raises on unknown dependencies and cycles
+    assert graph.select(["dialogue"]) and graph.select(["instruction"])
+    assert any(name.startswith("stream.") for name in graph.names) == streaming
+
+
+def test_thread_tasks_default_to_threads(config, tmp_path):
+    graph = main.build_graph(config, PipelineTasks(config, str(tmp_path), None, None))
+    executors = {stage["task"]: graph._stages[stage["name"]]["executor"]
+                 for stage in config.get("pipeline.stages") if stage["name"] in graph._stages}
+    for task, executor in executors.items():
+        expected = "thread" if task in PipelineTasks.THREAD_TASKS else config.get("pipeline.executor")
+        assert executor == expected, task
+
+
+def test_unknown_task_is_rejected(config, tmp_path):
+    tasks = PipelineTasks(config, str(tmp_path), None, None)
+    with pytest.raises(ValueError, match="unknown task"):
+        tasks({"name": "x", "task": "nope"}, [])
+
+
+def test_parse_args_splits_stages():
+    assert main.parse_args(["--stages", "persona, instruction,"]).stages == ("persona", "instruction")
+    assert main.parse_args([]).stages is None
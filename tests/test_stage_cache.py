@@ -0,0 +1,259 @@
+# tests/test_stage_cache.py
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from preprocessing.stage_cache import StageCache, code_version, file_digest
+
+LOGGER = "tests.stage_cache"
+
+
+class Calls:
+    """A compute/writer callback that counts its calls."""
+
+    def __init__(self, value=None):
+        self.count = 0
+        self.value = value
+
+    def __call__(self):
+        self.count += 1
+        return self.value
+
+
+def cache_at(tmp_path, **kwargs):
+    return StageCache(str(tmp_path / "cache"), logger=logging.getLogger(LOGGER), **kwargs)
+
+
+# === Keys ===
+
+def test_key_is_stable_and_covers_every_part(tmp_path):
+    cache = cache_at(tmp_path)
+    base = cache.key("clean", "upstream", {"a": 1, "b": [1, 2]}, "v1")
+    assert cache.key("clean", "upstream", {"b": [1, 2], "a": 1}, "v1") == base  # dict order is irrelevant
+    assert cache.key("split", "upstream", {"a": 1, "b": [1, 2]}, "v1") != base
+    assert cache.key("clean", "other", {"a": 1, "b": [1, 2]}, "v1") != base
+    assert cache.key("clean", "upstream", {"a": 2, "b": [1, 2]}, "v1") != base
+    assert cache.key("clean", "upstream", {"a": 1, "b": [2, 1]}, "v1") != base
+    assert cache.key("clean", "upstream", {"a": 1, "b": [1, 2]}, "v2") != base
+
+
+def test_file_digest_follows_content(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("[1]", encoding="utf-8")
+    before = file_digest(str(path), chunk_size=1)
+    assert file_digest(str(path)) == before
+    path.write_text("[2]", encoding="utf-8")
+    assert file_digest(str(path)) != before
+
+
+# === run ===
+
+def test_run_reuses_results_until_the_key_changes(tmp_path, caplog):
+    cache = cache_at(tmp_path)
+    compute = Calls({"rows": [1, 2, 3]})
+    key = cache.key("stage", "a")
+
+    assert not cache.contains("stage", key)
+    assert cache.run("stage", key, compute) == {"rows": [1, 2, 3]}
+    assert cache.contains("stage", key)
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        assert cache.run("stage", key, compute) == {"rows": [1, 2, 3]}
+    assert compute.count == 1
+    assert "Reusing 'stage'" in caplog.text
+
+    # A fresh instance on the same directory reuses it too
+    assert cache_at(tmp_path).run("stage", key, compute) == {"rows": [1, 2, 3]}
+    assert compute.count == 1
+
+    cache.run("stage", cache.key("stage", "b"), compute)
+    assert compute.count == 2
+
+
+def test_disabled_cache_always_computes(tmp_path):
+    cache = cache_at(tmp_path, enabled=False)
+    compute = Calls(1)
+    for _ in range(2):
+        cache.run("stage", "key", compute)
+    assert compute.count == 2
+    assert not cache.contains("stage", "key")
+    assert not (tmp_path / "cache").exists()
+
+
+def test_concurrent_misses_on_the_same_key(tmp_path):
+    cache = cache_at(tmp_path)
+    results = []
+
+    def compute():
+        time.sleep(0.05)
+        return list(range(1000))
+
+    threads = [threading.Thread(target=lambda: results.append(cache.run("stage", "k", compute))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [list(range(1000))] * 4
+    assert os.listdir(tmp_path / "cache" / "stage") == ["k.pkl"]
+
+
+# === Eviction ===
+
+def store(cache, key, age, size=40_000):
+    """Store a result of about `size` bytes and backdate it by `age` seconds."""
+    cache.run("stage", key, lambda: b"x" * size)
+    path = pickle_path(cache, key)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+def pickle_path(cache, key):
+    return cache.cache_dir / "stage" / f"{key}.pkl"
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = cache_at(tmp_path, max_size_mb=0.1)  # room for two 40 KB results
+    store(cache, "old", age=300)
+    store(cache, "used", age=200)
+    cache.run("stage", "used", Calls())  # a hit marks it as recently used
+    store(cache, "new", age=100)
+
+    assert not pickle_path(cache, "old").exists()
+    assert pickle_path(cache, "used").exists()
+    assert pickle_path(cache, "new").exists()
+
+    # An evicted result is simply recomputed
+    compute = Calls(b"y")
+    assert cache.run("stage", "old", compute) == b"y"
+    assert compute.count == 1
+
+
+def test_the_result_just_written_is_never_evicted(tmp_path):
+    cache = cache_at(tmp_path, max_size_mb=0.01)
+    store(cache, "first", age=100)
+    cache.run("stage", "big", lambda: b"x" * 100_000)
+    assert pickle_path(cache, "big").exists()
+    assert not pickle_path(cache, "first").exists()
+
+
+def test_unbounded_cache_keeps_everything(tmp_path):
+    cache = cache_at(tmp_path)
+    for key in "abc":
+        store(cache, key, age=0)
+    assert sorted(os.listdir(cache.cache_dir / "stage")) == ["a.pkl", "b.pkl", "c.pkl"]
+
+
+def test_invalid_size_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        cache_at(tmp_path, max_size_mb=0)
+
+
+# === write ===
+
+def write_file(path, text):
+    def writer():
+        writer.count += 1
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+    writer.count = 0
+    return writer
+
+
+def test_write_short_circuits_up_to_date_outputs(tmp_path, caplog):
+    cache = cache_at(tmp_path)
+    output = tmp_path / "train.jsonl"
+    writer = write_file(output, "rows")
+
+    assert cache.write(str(output), "k1", writer) == str(output)
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        assert cache.write(str(output), "k1", writer) == str(output)
+    assert writer.count == 1
+    assert f"Up to date: {output}" in caplog.text
+
+    # The manifest is persisted: a new run with the same key skips the write as well
+    assert cache_at(tmp_path).write(str(output), "k1", writer) == str(output)
+    assert writer.count == 1
+
+
+def test_write_reruns_when_the_key_changes_or_the_file_is_gone(tmp_path):
+    cache = cache_at(tmp_path)
+    output = tmp_path / "train.jsonl"
+    writer = write_file(output, "rows")
+
+    cache.write(str(output), "k1", writer)
+    cache.write(str(output), "k2", writer)
+    assert writer.count == 2
+    output.unlink()
+    cache.write(str(output), "k2", writer)
+    assert writer.count == 3
+    assert output.exists()
+
+
+def test_disabled_cache_always_writes(tmp_path):
+    cache = cache_at(tmp_path, enabled=False)
+    output = tmp_path / "train.jsonl"
+    writer = write_file(output, "rows")
+    cache.write(str(output), "k", writer)
+    cache.write(str(output), "k", writer)
+    assert writer.count == 2
+
+
+# === code_version ===
+
+@pytest.fixture
+def local_package(tmp_path, monkeypatch):
+    """A throwaway package `cvpkg` whose `stage` module imports a sibling and a stdlib module."""
+    root = tmp_path / "src"
+    package = root / "cvpkg"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "helpers.py").write_text("PATTERN = 'a'\n", encoding="utf-8")
+    (package / "unused.py").write_text("X = 1\n", encoding="utf-8")
+    (package / "stage.py").write_text(
+        "import json\nfrom .helpers import PATTERN\n\nclass Stage:\n    pass\n", encoding="utf-8"
+    )
+    monkeypatch.syspath_prepend(str(root))
+    yield package
+    for name in [name for name in sys.modules if name.split(".")[0] == "cvpkg"]:
+        del sys.modules[name]
+
+
+def load(name):
+    importlib.invalidate_caches()
+    if name in sys.modules:
+        return importlib.reload(sys.modules[name])
+    return importlib.import_module(name)
+
+
+def test_code_version_covers_local_imports(local_package):
+    helpers = load("cvpkg.helpers")
+    stage = load("cvpkg.stage")
+    load("cvpkg.unused")
+    before = code_version(stage.Stage)
+    # The same modules however they are named
+    assert code_version(stage.Stage, helpers) == before
+    assert code_version(helpers) != before
+
+    # Editing an imported sibling changes the version...
+    (local_package / "helpers.py").write_text("PATTERN = 'changed'\n", encoding="utf-8")
+    load("cvpkg.helpers")
+    changed = code_version(stage.Stage)
+    assert changed != before
+
+    # ...editing a module it does not import does not
+    (local_package / "unused.py").write_text("X = 'changed'\n", encoding="utf-8")
+    load("cvpkg.unused")
+    assert code_version(stage.Stage) == changed
+
+
+def test_code_version_of_pipeline_classes_follows_their_imports():
+    from preprocessing import cleaning_engine, constants
+    from preprocessing.text_cleaner import TextCleaner
+
+    version = code_version(TextCleaner)
+    assert version == code_version(TextCleaner, cleaning_engine, constants)
+    assert version != code_version(cleaning_engine)
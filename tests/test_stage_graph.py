@@ -0,0 +1,201 @@
+# tests/test_stage_graph.py
+import functools
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from preprocessing.stage_graph import StageGraph
+
+EXECUTORS = StageGraph.EXECUTORS
+
+
+# Stage functions are module-level so the "process" executor can pickle them
+
+def constant(value, inputs):
+    return value
+
+
+def concat(inputs):
+    return sum(inputs, [])
+
+
+def nothing(inputs):
+    return None
+
+
+def fail(inputs):
+    raise RuntimeError("stage failed")
+
+
+def slow(seconds, value, inputs):
+    time.sleep(seconds)
+    return value
+
+
+def pid(inputs):
+    return os.getpid()
+
+
+def record(log, name, inputs, seconds=0):
+    log.append(name)
+    time.sleep(seconds)
+    return [name]
+
+
+def diamond(executor="thread", workers=2):
+    graph = StageGraph(workers=workers, executor=executor)
+    graph.add("persona.load", functools.partial(constant, ["p"]), group="dialogue")
+    graph.add("daily.load", functools.partial(constant, ["d"]), group="dialogue")
+    graph.add("merge", concat, after=["persona.load", "daily.load"], group="dialogue")
+    graph.add("instruction.ingest", functools.partial(constant, ["i"]), group="instruction")
+    graph.add("instruction.merge", concat, after=["merge", "instruction.ingest"], group="instruction")
+    return graph
+
+
+@pytest.mark.parametrize("executor", EXECUTORS)
+def test_runs_stages_after_their_inputs(executor):
+    results = diamond(executor).run()
+    assert results["merge"] == ["p", "d"]
+    assert results["instruction.merge"] == ["p", "d", "i"]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_results_do_not_depend_on_workers(workers):
+    assert diamond(workers=workers).run() == diamond(workers=1).run()
+
+
+def test_independent_stages_overlap():
+    graph = StageGraph(workers=3, executor="thread")
+    for name in ("a", "b", "c"):
+        graph.add(name, functools.partial(slow, 0.3, [name]))
+    graph.add("all", concat, after=["a", "b", "c"])
+    start = time.perf_counter()
+    assert graph.run()["all"] == ["a", "b", "c"]
+    assert time.perf_counter() - start < 0.8
+
+
+def test_dependency_cycle_is_rejected():
+    graph = StageGraph()
+    graph.add("a", concat, after=["c"])
+    graph.add("b", concat, after=["a"])
+    graph.add("c", concat, after=["b"])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.run()
+
+
+def test_self_dependency_is_rejected():
+    graph = StageGraph()
+    graph.add("a", concat, after=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.run()
+
+
+def test_unknown_dependency_is_rejected():
+    graph = StageGraph()
+    graph.add("a", concat, after=["missing"])
+    with pytest.raises(ValueError, match="unknown stage"):
+        graph.run()
+
+
+def test_duplicate_stage_is_rejected():
+    graph = StageGraph()
+    graph.add("a", concat)
+    with pytest.raises(ValueError, match="Duplicate"):
+        graph.add("a", concat)
+
+
+@pytest.mark.parametrize("kwargs", [{"workers": 0}, {"executor": "gpu"}])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        StageGraph(**kwargs)
+
+
+def test_select_names_prefixes_and_groups():
+    graph = diamond()
+    assert graph.select(None) == graph.names
+    assert graph.select(["merge"]) == ["merge"]
+    assert graph.select(["persona"]) == ["persona.load"]
+    assert graph.select(["instruction"]) == ["instruction.ingest", "instruction.merge"]
+    assert graph.select(["dialogue", "instruction.ingest"]) == [
+        "persona.load", "daily.load", "merge", "instruction.ingest"
+    ]
+    # A prefix only matches at a dot
+    assert graph.select(["instruction.merge"]) == ["instruction.merge"]
+
+
+def test_unknown_selector_is_rejected():
+    with pytest.raises(ValueError, match="Unknown stage"):
+        diamond().select(["persona", "nope"])
+
+
+def test_stages_whose_inputs_are_not_selected_are_skipped():
+    log = []
+    graph = StageGraph(workers=2, executor="thread")
+    graph.add("a.load", functools.partial(record, log, "a.load"))
+    graph.add("b.load", functools.partial(record, log, "b.load"))
+    graph.add("merge", functools.partial(record, log, "merge"), after=["a.load", "b.load"])
+    graph.add("merge.save", functools.partial(record, log, "merge.save"), after=["merge"])
+
+    results = graph.run(["a", "merge"])
+    assert log == ["a.load"]
+    assert results == {"a.load": ["a.load"], "b.load": None, "merge": None, "merge.save": None}
+
+
+def test_stages_after_an_empty_result_are_skipped():
+    log = []
+    graph = StageGraph(executor="thread")
+    graph.add("tokenize", nothing)
+    graph.add("tokenize.save", functools.partial(record, log, "tokenize.save"), after=["tokenize"])
+    graph.add("other", functools.partial(record, log, "other"))
+    results = graph.run()
+    assert log == ["other"]
+    assert results["tokenize.save"] is None
+
+
+@pytest.mark.parametrize("executor", EXECUTORS)
+def test_failure_propagates(executor):
+    graph = StageGraph(workers=2, executor=executor)
+    graph.add("ok", functools.partial(constant, [1]))
+    graph.add("bad", fail)
+    graph.add("after_bad", concat, after=["bad"])
+    with pytest.raises(RuntimeError, match="stage failed"):
+        graph.run()
+
+
+def test_failure_cancels_pending_stages_and_shuts_down_pools():
+    log = []
+    threads_before = threading.active_count()
+    graph = StageGraph(workers=1, executor="thread")
+    graph.add("bad", fail)
+    for name in ("queued.1", "queued.2", "queued.3"):
+        graph.add(name, functools.partial(record, log, name, seconds=0.2))
+    graph.add("after_bad", functools.partial(record, log, "after_bad"), after=["bad"])
+
+    with pytest.raises(RuntimeError):
+        graph.run()
+    # "bad" ran first on the single worker. The worker may already have
+    # picked up the next stage; the ones queued behind it were cancelled.
+    assert len(log) <= 1
+    assert "after_bad" not in log
+    assert threading.active_count() == threads_before
+
+
+def test_process_pool_is_shut_down_after_failure():
+    graph = StageGraph(workers=2, executor="process")
+    graph.add("bad", fail)
+    with pytest.raises(RuntimeError):
+        graph.run()
+    # No worker processes are left behind
+    assert not multiprocessing.active_children()
+
+
+def test_per_stage_executor_override():
+    graph = StageGraph(executor="process")
+    graph.add("worker", pid)
+    graph.add("here", lambda inputs: os.getpid(), executor="thread")  # lambdas are fine on threads
+    results = graph.run()
+    assert results["here"] == os.getpid()
+    assert results["worker"] != os.getpid()
@@ -0,0 +1,83 @@
+# tests/test_stage_profiler.py
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from preprocessing.stage_profiler import StageProfiler
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="process liveness is only checked on POSIX")
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write_part(report_path, main_pid, stage, stamp="20260101T000000000000", worker_pid=1):
+    part = f"{report_path}.{stamp}-{main_pid}.{worker_pid}.part"
+    with open(part, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"stage": stage, "start_offset_seconds": 0}) + "\n")
+    return part
+
+
+@posix_only
+def test_parts_of_dead_runs_are_removed(tmp_path):
+    report_path = str(tmp_path / "profile.json")
+    part = write_part(report_path, dead_pid(), "crashed")
+    StageProfiler(report_path)
+    assert not os.path.exists(part)
+
+
+@posix_only
+def test_parts_of_live_runs_are_kept(tmp_path):
+    report_path = str(tmp_path / "profile.json")
+    concurrent = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        part = write_part(report_path, concurrent.pid, "concurrent")
+        profiler = StageProfiler(report_path)
+        assert os.path.exists(part)
+
+        # The report only collects this run's parts
+        with profiler.stage("mine"):
+            pass
+        profiler.write_report()
+        with open(report_path, encoding="utf-8") as f:
+            assert [entry["stage"] for entry in json.load(f)["stages"]] == ["mine"]
+        assert os.path.exists(part)
+    finally:
+        concurrent.kill()
+        concurrent.wait()
+
+
+def test_old_parts_are_removed_where_liveness_is_unknown(tmp_path, monkeypatch):
+    monkeypatch.setattr("preprocessing.stage_profiler._pid_alive", lambda pid: None)
+    report_path = str(tmp_path / "profile.json")
+    old = write_part(report_path, os.getpid(), "old", worker_pid=1)
+    recent = write_part(report_path, os.getpid(), "recent", worker_pid=2)
+    stamp = time.time() - StageProfiler.STALE_PART_SECONDS - 60
+    os.utime(old, (stamp, stamp))
+
+    StageProfiler(report_path)
+    assert not os.path.exists(old)
+    assert os.path.exists(recent)
+
+
+def test_unrelated_files_are_left_alone(tmp_path):
+    report_path = str(tmp_path / "profile.json")
+    other = tmp_path / "profile.json.notes.part"
+    other.write_text("keep", encoding="utf-8")
+    StageProfiler(report_path)
+    assert other.exists()
+
+
+def test_disabled_profiler_touches_nothing(tmp_path):
+    report_path = str(tmp_path / "profile.json")
+    part = write_part(report_path, dead_pid(), "crashed")
+    profiler = StageProfiler(report_path, enabled=False)
+    assert os.path.exists(part)
+    assert profiler.write_report() is None
@@ -0,0 +1,79 @@
+# tests/test_token_shards.py
+import json
+import random
+
+import numpy as np
+import pytest
+
+from preprocessing.token_shards import ByteTokenizer, TokenShards, TokenShardWriter, token_dtype
+
+EOS = ByteTokenizer.eos_id
+
+
+def documents(count, seed=0):
+    rng = random.Random(seed)
+    alphabet = "abcdé🙂 \n"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(count)]
+
+
+def expected_ids(text):
+    return list(text.encode("utf-8")) + [EOS]
+
+
+@pytest.mark.parametrize("shard_tokens", [1, 16, 64, 1 << 20])
+def test_round_trip_across_shard_boundaries(tmp_path, shard_tokens):
+    texts = documents(200) + ["", "x", ""]
+    manifest_path = TokenShardWriter(str(tmp_path / "out" / "train_tokens"), shard_tokens=shard_tokens).write_all(texts)
+
+    shards = TokenShards(manifest_path)
+    assert len(shards) == len(texts)
+    for idx, text in enumerate(texts):
+        assert shards[idx].tolist() == expected_ids(text)
+    assert shards[-1].tolist() == [EOS]
+
+    manifest = json.loads(open(manifest_path, encoding="utf-8").read())
+    assert manifest["documents"] == len(texts)
+    assert manifest["tokens"] == sum(len(expected_ids(text)) for text in texts)
+    assert sum(shard["documents"] for shard in manifest["shards"]) == len(texts)
+    if shard_tokens < manifest["tokens"]:
+        assert len(manifest["shards"]) > 1
+    for number, shard in enumerate(manifest["shards"]):
+        # A shard only exceeds shard_tokens when it holds a single document
+        assert shard["tokens"] <= shard_tokens or shard["documents"] == 1
+        assert len(shards.tokens(number)) == shard["tokens"]
+
+
+def test_document_on_the_boundary_starts_a_new_shard(tmp_path):
+    # "abc" + EOS is 4 tokens: two fill a shard of 8 exactly, the third opens shard 1
+    manifest_path = TokenShardWriter(str(tmp_path / "t"), shard_tokens=8).write_all(["abc"] * 3)
+    manifest = json.loads(open(manifest_path, encoding="utf-8").read())
+    assert [shard["documents"] for shard in manifest["shards"]] == [2, 1]
+    shards = TokenShards(manifest_path)
+    assert [shards[i].tolist() for i in range(3)] == [expected_ids("abc")] * 3
+
+
+def test_empty_documents_keep_their_index(tmp_path):
+    texts = ["", "first", "", "", "second"]
+    shards = TokenShards(TokenShardWriter(str(tmp_path / "t"), shard_tokens=4).write_all(texts))
+    assert [shards[i].tolist() for i in range(len(texts))] == [expected_ids(t) for t in texts]
+
+
+def test_no_documents_writes_an_empty_manifest(tmp_path):
+    manifest_path = TokenShardWriter(str(tmp_path / "t")).write_all([])
+    shards = TokenShards(manifest_path)
+    assert len(shards) == 0
+    with pytest.raises(IndexError):
+        shards[0]
+
+
+def test_reader_returns_memmap_views(tmp_path):
+    shards = TokenShards(TokenShardWriter(str(tmp_path / "t")).write_all(["hello", "world"]))
+    assert isinstance(shards.tokens(0), np.memmap)
+    assert shards[1].dtype == token_dtype(ByteTokenizer.vocab_size)
+    with pytest.raises(IndexError):
+        shards[2]
+
+
+def test_large_vocabularies_use_uint32():
+    assert token_dtype(1 << 16) == np.uint16
+    assert token_dtype((1 << 16) + 1) == np.uint32